@@ -425,6 +425,7 @@ class SettingsGui(qt.QTabWidget):
         self._highlightTarget = qt.QCheckBox()
         self._highlightSentence = qt.QCheckBox()
         self._openOnStart = qt.QCheckBox()
+        self._warmStart = qt.QCheckBox()
         self._globalHotkeys = qt.QCheckBox()
         self._globalOpen = qt.QCheckBox()
         self._restoreButton = qt.QPushButton("Restore Defaults")
@@ -504,6 +505,9 @@ class SettingsGui(qt.QTabWidget):
         self._openOnStart.setToolTip(
             "Enable/Disable launching the Migaku Dictionary on profile load."
         )
+        self._warmStart.setToolTip(
+            "Prepare the Migaku Dictionary in the background on profile load,\nso that the first search opens it instantly. This uses more memory."
+        )
         linNote = ""
         self._globalHotkeys.setToolTip("Enable/Disable global hotkeys." + linNote)
         self._globalOpen.setToolTip(
@@ -528,6 +532,7 @@ class SettingsGui(qt.QTabWidget):
     def _loadConfig(self) -> None:
         config = self._getConfig()
         self._openOnStart.setChecked(config["dictOnStart"])
+        self._warmStart.setChecked(config["dictWarmStart"])
         self._highlightSentence.setChecked(config["highlightSentences"])
         self._highlightTarget.setChecked(config["highlightTarget"])
         self._totalDefs.setValue(config["maxSearch"])
@@ -559,6 +564,7 @@ class SettingsGui(qt.QTabWidget):
 
         nc = self._getConfig()
         nc["dictOnStart"] = self._openOnStart.isChecked()
+        nc["dictWarmStart"] = self._warmStart.isChecked()
         nc["highlightSentences"] = self._highlightSentence.isChecked()
         nc["highlightTarget"] = self._highlightTarget.isChecked()
         nc["maxSearch"] = self._totalDefs.value()
@@ -593,11 +599,8 @@ class SettingsGui(qt.QTabWidget):
         if nc["mp3Convert"]:
             self._ffmpegInstaller.installFFMPEG()
 
-        if migaku_dictionary.get_visible_dictionary():
-            miutils.miInfo(
-                "Please be aware that the dictionary window will not reflect any setting changes until it is closed and reopened.",
-                level="not",
-            )
+        if dictionary := migaku_dictionary.get_visible_dictionary():
+            dictionary.applyConfiguration()
 
     def _updateAudioDirectory(self) -> None:
         directory = str(
@@ -820,6 +823,11 @@ class SettingsGui(qt.QTabWidget):
         startupLay.addWidget(self._openOnStart)
         optLay1.addLayout(startupLay)
 
+        warmStartLay = qt.QHBoxLayout()
+        warmStartLay.addWidget(self._miQLabel("Prepare on Startup:", 182))
+        warmStartLay.addWidget(self._warmStart)
+        optLay1.addLayout(warmStartLay)
+
         highSentLay = qt.QHBoxLayout()
         highSentLay.addWidget(self._miQLabel("Highlight Examples Sentences:", 182))
         highSentLay.addWidget(self._highlightSentence)
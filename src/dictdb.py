@@ -2,24 +2,79 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import mmap
 import os.path
 import re
 import sqlite3
 import typing
+import zlib
 from collections import abc
 
 from . import typer
 
 addon_path = os.path.dirname(__file__)
-from aqt import mw
 
 _DictionaryHeader = tuple[str, ...]
 _INSTANCE: typing.Optional[DictDB] = None
-DictSearchResults = dict[str, list[typer.DictionaryResult]]
+DictSearchResults = dict[str, list[typer.DictionarySearchHeader]]
 _LOGGER = logging.getLogger(__name__)
 
+_NOT_SET_FREQUENCY = 999999
+# NOTE: The star rating of a frequency. It's derived whenever rows are read, so the
+# ``starCount`` column of dictionary tables is left NULL.
+#
+_STAR_COUNT_CASE = """
+    CASE
+        WHEN {column} < 1501 THEN '★★★★★'
+        WHEN {column} < 5001 THEN '★★★★'
+        WHEN {column} < 15001 THEN '★★★'
+        WHEN {column} < 30001 THEN '★★'
+        WHEN {column} < 60001 THEN '★'
+        ELSE ''
+    END
+"""
+# NOTE: How many SQLite virtual machine instructions run between cancel checks.
+_PROGRESS_HANDLER_INSTRUCTIONS = 100000
+# NOTE: The columns that make up the content of a dictionary entry. Frequency and
+# pitch data are deliberately not part of it. ``updateDict`` refreshes them separately.
+#
+_HASHED_COLUMNS = "term, altterm, pronunciation, pos, definition, examples, audio"
+_HASHED_COLUMN_COUNT = 7
+# NOTE: Hashes stored rows the way ``_Deduplicator`` hashes new rows, which still have
+# their definitions uncompressed.
+#
+_HASHED_VALUES = (
+    "term, altterm, pronunciation, pos, entry_definition(definition), examples, audio"
+)
+# NOTE: The columns of a row made by the dictionary importer, in order. ``pitch`` and
+# ``dictFrequency`` come from the dictionary's own term meta banks. ``dictFrequency``
+# is NULL where the dictionary has no frequency so the language's list is used instead.
+#
+_ROW_COLUMNS = (
+    "term, altterm, pronunciation, pos, definition, examples, audio, frequency, "
+    "starCount, pitch, dictFrequency"
+)
+# NOTE: Columns that were added to dictionary tables after their first release.
+_ADDED_COLUMNS = (("pitch", "TEXT"), ("dictFrequency", "MEDIUMINT"))
+# NOTE: Keep this in sync with how ``MIDict`` styles example sentences.
+_EXAMPLE_SENTENCE = re.compile("「([^」]+)」")
+# NOTE: The trigram tokenizer can only match search terms of at least this length.
+_TRIGRAM_LENGTH = 3
+# NOTE: How many entry hashes an import keeps in memory to drop duplicate entries.
+# Any more are moved into a temporary table.
+#
+_DEDUPLICATION_MEMORY_LIMIT = 1000000
+# NOTE: Definitions of at least this many bytes are stored zlib-compressed. Shorter
+# ones barely shrink and stay plain text, which SQLite can search directly.
+#
+_COMPRESSED_DEFINITION_SIZE = 256
+# NOTE: Stay below SQLite's default limit of 999 variables per statement
+_ROWID_BATCH_SIZE = 500
+DictionaryRow = typing.Sequence[typing.Optional[str]]
+
 
 class _DictionaryResultTuple(typing.NamedTuple):
     # See Also: typing.DictionaryResult
@@ -31,17 +86,138 @@ class _DictionaryResultTuple(typing.NamedTuple):
     examples: str
     audio: str
     starCount: str
+    rowid: int
+
+
+class _DictionarySearchHeaderTuple(typing.NamedTuple):
+    # See Also: typing.DictionarySearchHeader
+    term: str
+    altterm: str
+    pronunciation: str
+    pos: int
+    starCount: str
+    rowid: int
 
 
 @typing.final
+class _Deduplicator:
+    """Hash the rows of an import and drop the rows whose content was seen before.
+
+    Yomichan / Yomitan dictionaries often repeat entries across their term banks.
+    Hashes are kept in a set until it holds ``_DEDUPLICATION_MEMORY_LIMIT`` of them.
+    Then they move into a temporary table of ``connection`` so that memory stays
+    bounded, however large the dictionary is.
+
+    """
+
+    def __init__(self, connection: sqlite3.Connection, name: str) -> None:
+        """Prepare the deduplication of one import.
+
+        Args:
+            connection: The database that holds the hashes which don't fit in memory.
+            name: The user-facing name of the imported dictionary, for messages.
+
+        """
+        super().__init__()
+
+        self._connection = connection
+        self._name = name
+        self._hashes: set[int] = set()
+        self._spilled: typing.Optional[sqlite3.Cursor] = None
+        self.duplicates = 0
+
+    def _spill(self) -> None:
+        if self._spilled is None:
+            self._spilled = self._connection.cursor()
+            self._spilled.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS dictionary_hashes "
+                "(hash INTEGER PRIMARY KEY);"
+            )
+            self._spilled.execute("DELETE FROM temp.dictionary_hashes;")
+
+        self._spilled.executemany(
+            "INSERT OR IGNORE INTO temp.dictionary_hashes VALUES (?);",
+            ((hash_,) for hash_ in self._hashes),
+        )
+        self._hashes.clear()
+
+    def _isDuplicate(self, hash_: int) -> bool:
+        if hash_ in self._hashes:
+            return True
+
+        if self._spilled is not None:
+            self._spilled.execute(
+                "SELECT 1 FROM temp.dictionary_hashes WHERE hash = ?;", (hash_,)
+            )
+
+            if self._spilled.fetchone():
+                return True
+
+        self._hashes.add(hash_)
+
+        if len(self._hashes) >= _DEDUPLICATION_MEMORY_LIMIT:
+            self._spill()
+
+        return False
+
+    def hashRows(
+        self, rows: typing.Iterable[DictionaryRow]
+    ) -> abc.Iterator[tuple[typing.Any, ...]]:
+        """Yield every new row of ``rows`` with its content hash appended."""
+        for row in rows:
+            hash_ = _hashEntry(*row[:_HASHED_COLUMN_COUNT])
+
+            if self._isDuplicate(hash_):
+                self.duplicates += 1
+            else:
+                yield (*row, hash_)
+
+    def close(self) -> int:
+        """Drop the temporary table, if any, and report the dropped duplicates.
+
+        Returns:
+            The number of dropped duplicates.
+
+        """
+        if self._spilled is not None:
+            self._spilled.execute("DROP TABLE IF EXISTS temp.dictionary_hashes;")
+            self._spilled = None
+
+        self._hashes.clear()
+
+        if self.duplicates:
+            _LOGGER.info(
+                'Dropped %d duplicate entries of "%s".',
+                self.duplicates,
+                self._name.replace("_", " "),
+            )
+
+        return self.duplicates
+
+
 class DictDB:
-    def __init__(self) -> None:
+    def __init__(self, db_file: typing.Optional[str] = None) -> None:
+        """Connect to the dictionary database.
+
+        Args:
+            db_file: The SQLite file to use. If omitted, the add-on's own database in
+                ``user_files/db`` is used, which needs a running Anki.
+
+        """
         super().__init__()
 
-        directory = os.path.join(mw.pm.addonFolder(), addon_path, "user_files", "db")
-        os.makedirs(directory, exist_ok=True)
+        if db_file is None:
+            from aqt import mw
 
-        db_file = os.path.join(directory, "dictionaries.sqlite")
+            directory = os.path.join(
+                mw.pm.addonFolder(), addon_path, "user_files", "db"
+            )
+            db_file = os.path.join(directory, "dictionaries.sqlite")
+        else:
+            directory = os.path.dirname(os.path.abspath(db_file))
+
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
 
         self._conn: sqlite3.Connection = sqlite3.connect(
             db_file, check_same_thread=False
@@ -52,6 +228,12 @@ class DictDB:
             raise RuntimeError(f'Database "{db_file}" has no cursor. Cannot connect!')
 
         self._c = cursor
+        self._conn.create_function(
+            "entry_hash", _HASHED_COLUMN_COUNT, _hashEntry, deterministic=True
+        )
+        self._conn.create_function(
+            "entry_definition", 1, decodeDefinition, deterministic=True
+        )
         self._c.execute("PRAGMA foreign_keys = ON")
         self._c.execute("PRAGMA case_sensitive_like=ON;")
 
@@ -78,6 +260,78 @@ class DictDB:
             """
         )
 
+        # NOTE: Where each media file of a dictionary is stored in its media blob
+        self._c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dictmedia (
+                dictname TEXT NOT NULL,
+                path TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (dictname, path)
+            ) WITHOUT ROWID
+            """
+        )
+        self._media: dict[str, mmap.mmap] = {}
+        self._createExampleTables()
+        self._addMissingColumns()
+
+    def _createExampleTables(self) -> None:
+        """Create the tables that hold the example sentences of every dictionary.
+
+        ``dictexamples`` has each sentence of each entry and where it is in the entry's
+        definition. If SQLite supports it, ``dictexamples_fts`` is a trigram index of
+        the sentences. It uses ``dictexamples`` as its content so nothing is stored
+        twice. ``dictexamplesindexed`` lists the dictionaries whose sentences exist.
+
+        """
+        self._c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dictexamples (
+                id INTEGER PRIMARY KEY,
+                dictname TEXT NOT NULL,
+                entry INTEGER NOT NULL,
+                start INTEGER NOT NULL,
+                end INTEGER NOT NULL,
+                sentence TEXT NOT NULL
+            )
+            """
+        )
+        self._c.execute(
+            "CREATE INDEX IF NOT EXISTS idictexamples ON dictexamples (dictname, entry);"
+        )
+        self._c.execute(
+            "CREATE TABLE IF NOT EXISTS dictexamplesindexed (dictname TEXT PRIMARY KEY);"
+        )
+
+        try:
+            self._c.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS dictexamples_fts USING fts5(sentence, content='dictexamples', content_rowid='id', tokenize='trigram');"
+            )
+        except sqlite3.OperationalError:
+            _LOGGER.info("SQLite has no trigram index. Example search is unindexed.")
+            self._hasExampleIndex = False
+        else:
+            self._hasExampleIndex = True
+
+        self._c.execute("SELECT dictname FROM dictexamplesindexed;")
+        self._indexedExamples = {name for (name,) in self._c.fetchall()}
+
+    def _addMissingColumns(self) -> None:
+        """Give dictionaries from older releases the columns that were added since."""
+        for pair in self._getDictToTable().values():
+            table = pair["dict"]
+            self._c.execute("SELECT name FROM pragma_table_info(?);", (table,))
+            existing = {name for (name,) in self._c.fetchall()}
+
+            for column, type_ in _ADDED_COLUMNS:
+                if existing and column not in existing:
+                    self._c.execute(
+                        "ALTER TABLE %s ADD COLUMN %s %s;" % (table, column, type_)
+                    )
+
+        self.commitChanges()
+
     def _getDuplicateSetting(self, name: str) -> typing.Optional[tuple[int, str]]:
         self._c.execute(
             "SELECT duplicateHeader, termHeader  FROM dictnames WHERE dictname=?",
@@ -132,38 +386,10 @@ class DictDB:
                 terms[idx] = terms[idx]
             elif sT == "Definition":
                 terms[idx] = "%" + terms[idx] + "%"
-            else:
-                terms[idx] = "%「%" + terms[idx] + "%」%"
+            # NOTE: "Example" terms are kept as-is because they search ``dictexamples``
 
     def _createDB(self, text: str) -> None:
-        self._c.execute(
-            "CREATE TABLE  IF NOT EXISTS  "
-            + text
-            + "(term CHAR(40) NOT NULL, altterm CHAR(40), pronunciation CHAR(100), pos CHAR(40), definition TEXT, examples TEXT, audio TEXT, frequency MEDIUMINT, starCount TEXT);"
-        )
-        self._c.execute(
-            "CREATE INDEX IF NOT EXISTS it" + text + " ON " + text + " (term);"
-        )
-        self._c.execute(
-            "CREATE INDEX IF NOT EXISTS itp"
-            + text
-            + " ON "
-            + text
-            + " ( term, pronunciation );"
-        )
-        self._c.execute(
-            "CREATE INDEX IF NOT EXISTS ia" + text + " ON " + text + " (altterm);"
-        )
-        self._c.execute(
-            "CREATE INDEX IF NOT EXISTS iap"
-            + text
-            + " ON "
-            + text
-            + " ( altterm, pronunciation );"
-        )
-        self._c.execute(
-            "CREATE INDEX IF NOT EXISTS ia" + text + " ON " + text + " (pronunciation);"
-        )
+        createDictionaryTable(self._c, text)
 
     def _deconjugate(
         self,
@@ -189,6 +415,12 @@ class DictDB:
         deconjugations = list(set(deconjugations))
         return terms + deconjugations
 
+    def getDeinflections(
+        self, term: str, conjugations: typing.Sequence[typer.Conjugation]
+    ) -> list[str]:
+        """Get the forms that ``term`` may be an inflection of, per ``conjugations``."""
+        return self._deconjugate([term], conjugations)[1:]
+
     def _dropTables(self, text: str) -> None:
         self._c.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE ?;",
@@ -204,10 +436,45 @@ class DictDB:
         toQuery: str,
         dictLimit: str,
         termTuple: tuple[str, ...],
-    ) -> list[_DictionaryResultTuple]:
+    ) -> list[typer.DictionaryResult]:
+        try:
+            self._c.execute(
+                "SELECT term, altterm, pronunciation, pos, definition, examples, audio, "
+                + _STAR_COUNT_CASE.format(column="frequency")
+                + ", rowid FROM "
+                + dictName
+                + " WHERE "
+                + toQuery
+                + " ORDER BY LENGTH(term) ASC, frequency ASC LIMIT "
+                + dictLimit
+                + " ;",
+                termTuple,
+            )
+            rows = [_DictionaryResultTuple(*row) for row in self._c.fetchall()]
+        except:
+            return []
+
+        spans = self._getExampleSpans(dictName, [row.rowid for row in rows])
+
+        return [self._resultToDict(row, spans.get(row.rowid, [])) for row in rows]
+
+    def _executeHeaderSearch(
+        self,
+        dictName: str,
+        toQuery: str,
+        dictLimit: str,
+        termTuple: tuple[str, ...],
+    ) -> list[typer.DictionarySearchHeader]:
+        """Search like ``_executeSearch`` but skip the large columns of each entry.
+
+        Use ``getDefinitions`` to get the definitions of the found rows later.
+
+        """
         try:
             self._c.execute(
-                "SELECT term, altterm, pronunciation, pos, definition, examples, audio, starCount FROM "
+                "SELECT term, altterm, pronunciation, pos, "
+                + _STAR_COUNT_CASE.format(column="frequency")
+                + ", rowid FROM "
                 + dictName
                 + " WHERE "
                 + toQuery
@@ -216,10 +483,101 @@ class DictDB:
                 + " ;",
                 termTuple,
             )
-            return self._c.fetchall()
+            rows = [_DictionarySearchHeaderTuple(*row) for row in self._c.fetchall()]
         except:
             return []
 
+        return [
+            {
+                "term": row.term,
+                "altterm": row.altterm,
+                "pronunciation": row.pronunciation,
+                "pos": row.pos,
+                "starCount": row.starCount,
+                "rowid": row.rowid,
+            }
+            for row in rows
+        ]
+
+    def _getExampleCriteria(
+        self, dictName: str, terms: typing.Sequence[str]
+    ) -> tuple[str, tuple[str, ...]]:
+        """Get a query for the entries of ``dictName`` with an example that has a term."""
+        queries: list[str] = []
+        values: list[str] = []
+
+        for term in terms:
+            if self._hasExampleIndex and len(term) >= _TRIGRAM_LENGTH:
+                queries.append(
+                    "SELECT e.entry FROM dictexamples_fts AS f INNER JOIN dictexamples AS e ON e.id = f.rowid WHERE dictexamples_fts MATCH ? AND e.dictname = ?"
+                )
+                values.append('"' + term.replace('"', '""') + '"')
+            else:
+                queries.append(
+                    "SELECT entry FROM dictexamples WHERE instr(sentence, ?) > 0 AND dictname = ?"
+                )
+                values.append(term)
+
+            values.append(self.cleanDictName(dictName))
+
+        return " rowid IN (" + " UNION ".join(queries) + ") ", tuple(values)
+
+    def _getDefinitionCriteria(
+        self, terms: typing.Sequence[str]
+    ) -> tuple[str, tuple[str, ...]]:
+        """Get a query for the entries whose definition is LIKE one of ``terms``.
+
+        Only compressed definitions go through ``entry_definition``. Plain ones are
+        matched by SQLite directly, which is much faster than calling into Python.
+
+        """
+        queries: list[str] = []
+        values: list[str] = []
+
+        for term in terms:
+            queries.append(
+                " (typeof(definition) = 'text' AND definition LIKE ?) OR (typeof(definition) = 'blob' AND entry_definition(definition) LIKE ?) "
+            )
+            values.extend((term, term))
+
+        return "OR".join(queries), tuple(values)
+
+    def _getExampleSpans(
+        self, dictName: str, rowids: typing.Sequence[int]
+    ) -> dict[int, list[tuple[int, int]]]:
+        if not rowids:
+            return {}
+
+        self._c.execute(
+            "SELECT entry, start, end FROM dictexamples WHERE dictname = ? AND entry IN ("
+            + ", ".join("?" * len(rowids))
+            + ") ORDER BY entry, start;",
+            (self.cleanDictName(dictName), *rowids),
+        )
+        spans: dict[int, list[tuple[int, int]]] = {}
+
+        for entry, start, end in self._c.fetchall():
+            spans.setdefault(entry, []).append((start, end))
+
+        return spans
+
+    def _removeExamples(
+        self, dictName: str, where: str = "", values: tuple[typing.Any, ...] = ()
+    ) -> None:
+        """Remove the example sentences of ``dictName`` that match ``where``, if given."""
+        condition = "dictname = ?" + (" AND " + where if where else "")
+        values = (self.cleanDictName(dictName), *values)
+
+        if self._hasExampleIndex:
+            self._c.execute(
+                "INSERT INTO dictexamples_fts (dictexamples_fts, rowid, sentence) SELECT 'delete', id, sentence FROM dictexamples WHERE "
+                + condition
+                + ";",
+                values,
+            )
+
+        self._c.execute("DELETE FROM dictexamples WHERE " + condition + ";", values)
+
     def _formatDictName(self, lid: typing.Any, name: str) -> str:
         return "l" + str(lid) + "name" + name
 
@@ -227,19 +585,40 @@ class DictDB:
         li = s.rsplit(old, occurrence)
         return new.join(li)
 
-    def _resultToDict(self, r: _DictionaryResultTuple) -> typer.DictionaryResult:
+    def _resultToDict(
+        self, r: _DictionaryResultTuple, exampleSpans: list[tuple[int, int]]
+    ) -> typer.DictionaryResult:
         return {
             "term": r[0],
             "altterm": r[1],
             "pronunciation": r[2],
             "pos": r[3],
-            "definition": r[4],
+            "definition": decodeDefinition(r[4]),
             "examples": r[5],
             "audio": r[6],
             "starCount": r[7],
+            "exampleSpans": exampleSpans,
         }
 
+    def getDirectory(self) -> str:
+        """Get the folder of the database, which also holds frequency and conjugation data."""
+        return self._directory
+
+    def getChangeMarker(self) -> tuple[int, int]:
+        """Get a value that changes whenever the database is written to.
+
+        Writes from this connection and from any other connection are both counted.
+        Compare two markers to know if e.g. a cached search is stale.
+
+        """
+        (version,) = self._conn.execute("PRAGMA data_version;").fetchone()
+
+        return (self._conn.total_changes, version)
+
     def closeConnection(self) -> None:
+        for name in list(self._media):
+            self._closeMedia(name)
+
         self._c.close()
 
     def getLangId(self, lang: str) -> typing.Optional[int]:
@@ -258,6 +637,12 @@ class DictDB:
     def deleteDict(self, d: str) -> None:
         self._dropTables(d)
         d_clean = self.cleanDictName(d)
+        self.setMedia(d_clean, None, [])
+        self._removeExamples(d_clean)
+        self._c.execute(
+            "DELETE FROM dictexamplesindexed WHERE dictname = ?;", (d_clean,)
+        )
+        self._indexedExamples.discard(d_clean)
         self._c.execute("DELETE FROM dictnames WHERE dictname = ?;", (d_clean,))
         self.commitChanges()
         self._c.execute("VACUUM;")
@@ -393,7 +778,7 @@ class DictDB:
         maxDefs: int,
     ) -> tuple[DictSearchResults, set[str]]:
         alreadyConjTyped: dict[str, list[str]] = {}
-        results: dict[str, list[typer.DictionaryResult]] = {}
+        results: DictSearchResults = {}
         group = selectedGroup["dictionaries"]
         totalDefs = 0
         defEx = self._getDefEx(sT)
@@ -437,15 +822,23 @@ class DictDB:
                     self._applySearchType(terms, sT)
                     alreadyConjTyped[term] = terms
 
-            toQuery = self._getQueryCriteria(column, terms, op)
-            termTuple = tuple(terms)
-            allRs = self._executeSearch(dic["dict"], toQuery, dictLimit, termTuple)
-            dictRes: list[typer.DictionaryResult] = []
+            if sT == "Example":
+                toQuery, termTuple = self._getExampleCriteria(dic["dict"], terms)
+            elif sT == "Definition":
+                toQuery, termTuple = self._getDefinitionCriteria(terms)
+            else:
+                toQuery = self._getQueryCriteria(column, terms, op)
+                termTuple = tuple(terms)
+
+            allRs = self._executeHeaderSearch(
+                dic["dict"], toQuery, dictLimit, termTuple
+            )
+            dictRes: list[typer.DictionarySearchHeader] = []
 
             if len(allRs) > 0:
                 for r in allRs:
                     totalDefs += 1
-                    dictRes.append(self._resultToDict(r))
+                    dictRes.append(r)
                     if totalDefs >= maxDefs:
                         results[self.cleanDictName(dic["dict"])] = dictRes
                         return results, known_dictionaries
@@ -455,13 +848,13 @@ class DictDB:
                 for col in columns:
                     toQuery = self._getQueryCriteria(col, terms, op)
                     termTuple = tuple(terms)
-                    allRs = self._executeSearch(
+                    allRs = self._executeHeaderSearch(
                         dic["dict"], toQuery, dictLimit, termTuple
                     )
                     if len(allRs) > 0:
                         for r in allRs:
                             totalDefs += 1
-                            dictRes.append(self._resultToDict(r))
+                            dictRes.append(r)
                             if totalDefs >= maxDefs:
                                 results[self.cleanDictName(dic["dict"])] = dictRes
                                 return results, known_dictionaries
@@ -469,6 +862,47 @@ class DictDB:
                         break
         return results, known_dictionaries
 
+    def getDefinitions(
+        self, dictName: str, rowids: typing.Sequence[int]
+    ) -> dict[int, typer.DictionaryDefinition]:
+        """Get the definitions of the ``searchTerm`` results with ``rowids``.
+
+        Args:
+            dictName: A dictionary name, as ``searchTerm`` returns it.
+            rowids: The rows to get. Unknown rows are skipped.
+
+        Returns:
+            Each found row and its definition.
+
+        """
+        table = self.getDictTable(dictName)
+
+        if not table:
+            return {}
+
+        definitions: dict[int, typer.DictionaryDefinition] = {}
+
+        for index in range(0, len(rowids), _ROWID_BATCH_SIZE):
+            batch = rowids[index : index + _ROWID_BATCH_SIZE]
+            self._c.execute(
+                "SELECT rowid, definition FROM "
+                + table
+                + " WHERE rowid IN ("
+                + ", ".join("?" * len(batch))
+                + ");",
+                tuple(batch),
+            )
+            rows = self._c.fetchall()
+            spans = self._getExampleSpans(table, batch)
+
+            for rowid, definition in rows:
+                definitions[rowid] = {
+                    "definition": decodeDefinition(definition),
+                    "exampleSpans": spans.get(rowid, []),
+                }
+
+        return definitions
+
     def getDefForMassExp(
         self,
         term: str,
@@ -493,22 +927,444 @@ class DictDB:
 
             if len(allRs) > 0:
                 for r in allRs:
-                    results.append(self._resultToDict(r))
+                    results.append(r)
 
                 break
 
         return results, duplicateHeader, termHeader
 
+    def _ensureHashes(self, dictName: str) -> None:
+        """Add the content hashes to a dictionary that was imported without them.
+
+        Rows with a NULL column are hashed again too. Older releases hashed NULL like
+        the text "None".
+
+        """
+        self._c.execute("SELECT name FROM pragma_table_info(?);", (dictName,))
+
+        if "hash" not in {name for (name,) in self._c.fetchall()}:
+            self._c.execute("ALTER TABLE " + dictName + " ADD COLUMN hash INTEGER;")
+
+        self._c.execute(
+            "UPDATE "
+            + dictName
+            + " SET hash = entry_hash("
+            + _HASHED_VALUES
+            + ") WHERE hash IS NULL OR "
+            + " OR ".join(column + " IS NULL" for column in _HASHED_COLUMNS.split(", "))
+            + ";"
+        )
+        self._c.execute(
+            "CREATE INDEX IF NOT EXISTS ih" + dictName + " ON " + dictName + " (hash);"
+        )
+
+    def getUnindexedExampleTables(self) -> list[str]:
+        """Find the dictionaries that were imported before example sentences were indexed.
+
+        Returns:
+            The tables which still need :meth:`indexExamples`.
+
+        """
+        return [
+            pair["dict"]
+            for pair in self._getDictToTable().values()
+            if self.cleanDictName(pair["dict"]) not in self._indexedExamples
+        ]
+
+    def indexExamples(self, dictName: str, afterRowid: int = 0) -> int:
+        """Find the 「example sentences」 of ``dictName`` and add them to ``dictexamples``.
+
+        Args:
+            dictName: The table of a dictionary.
+            afterRowid: Only index the entries after this rowid. If 0, every existing
+                sentence of the dictionary is replaced.
+
+        Returns:
+            The number of indexed sentences.
+
+        """
+        name = self.cleanDictName(dictName)
+
+        if not afterRowid:
+            self._removeExamples(dictName)
+
+        self._c.execute("SELECT MAX(id) FROM dictexamples;")
+        (lastId,) = self._c.fetchone()
+        # NOTE: A second cursor streams the definitions while the first one inserts
+        reader = self._conn.cursor()
+        reader.execute(
+            "SELECT rowid, definition FROM "
+            + dictName
+            + " WHERE rowid > ? AND (typeof(definition) = 'blob' OR instr(definition, '「') > 0);",
+            (afterRowid,),
+        )
+        self._c.executemany(
+            "INSERT INTO dictexamples (dictname, entry, start, end, sentence) VALUES (?, ?, ?, ?, ?);",
+            (
+                (name, rowid, match.start(), match.end(), match.group(1))
+                for rowid, definition in reader
+                for match in _EXAMPLE_SENTENCE.finditer(decodeDefinition(definition))
+            ),
+        )
+        count = self._c.rowcount
+
+        if self._hasExampleIndex:
+            self._c.execute(
+                "INSERT INTO dictexamples_fts (rowid, sentence) SELECT id, sentence FROM dictexamples WHERE id > ?;",
+                (lastId or 0,),
+            )
+
+        self._c.execute(
+            "INSERT OR IGNORE INTO dictexamplesindexed (dictname) VALUES (?);", (name,)
+        )
+        self._indexedExamples.add(name)
+        self.commitChanges()
+
+        return count
+
     def importToDict(
-        self, dictName: str, dictionaryData: typing.Iterable[list[str]]
+        self, dictName: str, dictionaryData: typing.Iterable[DictionaryRow]
+    ) -> tuple[int, int]:
+        return insertDictionaryRows(
+            self._c, dictName, dictionaryData, self.cleanDictName(dictName)
+        )
+
+    def installPack(self, dictName: str, packPath: str) -> int:
+        """Copy the entries of a dictionary pack into the empty table ``dictName``.
+
+        The pack's table has the same layout and indexes as ``dictName``, so SQLite
+        copies its records and index entries as they are instead of re-inserting them.
+
+        Returns:
+            The number of installed rows.
+
+        """
+        self._c.execute("ATTACH DATABASE ? AS pack;", (packPath,))
+
+        try:
+            self._c.execute("INSERT INTO " + dictName + " SELECT * FROM pack.entries;")
+            rows = self._c.rowcount
+            self.commitChanges()
+        except Exception:
+            self._conn.rollback()
+
+            raise
+        finally:
+            self._c.execute("DETACH DATABASE pack;")
+
+        return rows
+
+    def _closeMedia(self, dictName: str) -> None:
+        blob = self._media.pop(dictName, None)
+
+        if blob is not None:
+            blob.close()
+
+    def getMediaPath(self, dictName: str) -> str:
+        """Get the file that holds every media file of the dictionary ``dictName``."""
+        return os.path.join(self._directory, "media", dictName + ".bin")
+
+    def setMedia(
+        self,
+        dictName: str,
+        blobPath: typing.Optional[str],
+        media: typing.Iterable[tuple[str, int, int]],
     ) -> None:
-        self._c.executemany(
-            "INSERT INTO "
-            + dictName
-            + " (term, altterm, pronunciation, pos, definition, examples, audio, frequency, starCount) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);",
-            dictionaryData,
+        """Replace the media of the dictionary ``dictName``.
+
+        Args:
+            dictName: The name of the dictionary, as stored in ``dictnames``.
+            blobPath: A file with the media, back to back. It is moved to
+                :meth:`getMediaPath`. If None, the dictionary's media is removed.
+            media: The ``(path, offset, size)`` of each media file in ``blobPath``.
+
+        """
+        self._closeMedia(dictName)
+        self._c.execute("DELETE FROM dictmedia WHERE dictname = ?;", (dictName,))
+        path = self.getMediaPath(dictName)
+
+        if blobPath is None:
+            if os.path.isfile(path):
+                os.remove(path)
+        else:
+            os.replace(blobPath, path)
+            self._c.executemany(
+                "INSERT INTO dictmedia (dictname, path, offset, size) VALUES (?, ?, ?, ?);",
+                ((dictName, *item) for item in media),
+            )
+
+        self.commitChanges()
+
+    def getMedia(self, dictName: str, path: str) -> typing.Optional[memoryview]:
+        """Get the contents of the media file ``path`` of the dictionary ``dictName``.
+
+        The media blob is memory-mapped the first time that it is needed, so reading
+        a file copies nothing until the caller uses the returned view. Release the view,
+        e.g. with a ``with`` statement, once done with it.
+
+        """
+        self._c.execute(
+            "SELECT offset, size FROM dictmedia WHERE dictname = ? AND path = ?;",
+            (dictName, path),
+        )
+        found = self._c.fetchone()
+
+        if not found:
+            return None
+
+        offset, size = found
+        blob = self._media.get(dictName)
+
+        if blob is None:
+            try:
+                with open(self.getMediaPath(dictName), "rb") as handler:
+                    blob = mmap.mmap(handler.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                _LOGGER.warning('Unable to read the media of "%s".', dictName)
+
+                return None
+
+            self._media[dictName] = blob
+
+        return memoryview(blob)[offset : offset + size]
+
+    def getDictTable(self, dictName: str) -> typing.Optional[str]:
+        """Get the table of the installed dictionary ``dictName``, if the table exists.
+
+        The table is named after the language that the dictionary was installed for.
+
+        """
+        self._c.execute("SELECT lid FROM dictnames WHERE dictname = ?;", (dictName,))
+        found = self._c.fetchone()
+
+        if not found:
+            return None
+
+        table = self._formatDictName(found[0], dictName)
+        self._c.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", (table,)
         )
 
+        return table if self._c.fetchone() else None
+
+    def hasDict(self, dictname: str) -> bool:
+        self._c.execute("SELECT 1 FROM dictnames WHERE dictname = ?;", (dictname,))
+
+        return self._c.fetchone() is not None
+
+    def updateDict(
+        self, dictName: str, dictionaryData: typing.Iterable[DictionaryRow]
+    ) -> tuple[int, int, int]:
+        """Replace the rows of ``dictName`` with ``dictionaryData``, writing only changes.
+
+        The new rows are staged in a temporary table and matched against the installed
+        rows by their content hash. Rows that are in both are kept and only have their
+        frequency and pitch refreshed where those changed, so the cost of updating the
+        table and its indexes follows the number of changed entries.
+
+        Args:
+            dictName: The table of an installed dictionary.
+            dictionaryData: Every row of the new release, in ``importToDict`` layout.
+
+        Returns:
+            The number of inserted and deleted rows and of dropped duplicates.
+
+        """
+        try:
+            self._ensureHashes(dictName)
+            self._c.execute("DROP TABLE IF EXISTS temp.dictionary_update;")
+            self._c.execute(
+                "CREATE TEMP TABLE dictionary_update AS SELECT "
+                + _ROW_COLUMNS
+                + ", hash FROM "
+                + dictName
+                + " WHERE 0;"
+            )
+            deduplicator = _Deduplicator(self._conn, self.cleanDictName(dictName))
+
+            try:
+                self._c.executemany(
+                    "INSERT INTO temp.dictionary_update VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+                    _encodeRows(deduplicator.hashRows(dictionaryData)),
+                )
+            finally:
+                duplicates = deduplicator.close()
+
+            self._c.execute(
+                "CREATE INDEX temp.idictionary_update ON dictionary_update (hash);"
+            )
+            self._c.execute(
+                "DELETE FROM "
+                + dictName
+                + " WHERE NOT EXISTS (SELECT 1 FROM temp.dictionary_update AS u WHERE u.hash = "
+                + dictName
+                + ".hash);"
+            )
+            deleted = self._c.rowcount
+            hasExamples = self.cleanDictName(dictName) in self._indexedExamples
+
+            if hasExamples:
+                self._removeExamples(
+                    dictName,
+                    "NOT EXISTS (SELECT 1 FROM "
+                    + dictName
+                    + " AS t WHERE t.rowid = dictexamples.entry)",
+                )
+                self._c.execute("SELECT MAX(rowid) FROM " + dictName + ";")
+                (lastRowid,) = self._c.fetchone()
+
+            self._c.execute(
+                "UPDATE "
+                + dictName
+                + " SET frequency = u.frequency, starCount = u.starCount, pitch = u.pitch, dictFrequency = u.dictFrequency FROM temp.dictionary_update AS u WHERE u.hash = "
+                + dictName
+                + ".hash AND ("
+                + dictName
+                + ".frequency IS NOT u.frequency OR "
+                + dictName
+                + ".pitch IS NOT u.pitch OR "
+                + dictName
+                + ".dictFrequency IS NOT u.dictFrequency);"
+            )
+            self._c.execute(
+                "INSERT INTO "
+                + dictName
+                + " ("
+                + _ROW_COLUMNS
+                + ", hash) SELECT "
+                + _ROW_COLUMNS
+                + ", hash FROM temp.dictionary_update AS u WHERE NOT EXISTS (SELECT 1 FROM "
+                + dictName
+                + " AS t WHERE t.hash = u.hash);"
+            )
+            inserted = self._c.rowcount
+
+            if hasExamples:
+                self.indexExamples(dictName, lastRowid or 0)
+        except Exception:
+            self._conn.rollback()
+
+            raise
+        finally:
+            self._c.execute("DROP TABLE IF EXISTS temp.dictionary_update;")
+
+        self.commitChanges()
+
+        return inserted, deleted, duplicates
+
+    def recomputeFrequencies(
+        self,
+        lang: str,
+        frequencies: typing.Iterable[tuple[str, str, int]],
+        progress: typing.Optional[typing.Callable[[int, int], None]] = None,
+        is_cancelled: typing.Optional[typing.Callable[[], bool]] = None,
+        dictNames: typing.Optional[typing.Container[str]] = None,
+    ) -> bool:
+        """Re-apply a frequency list to every installed dictionary of ``lang``.
+
+        The list is loaded into a temporary table and each dictionary table is then
+        refreshed with set-based ``UPDATE ... FROM`` statements. Only rows whose
+        frequency actually changes are written. Rows that have a frequency from their
+        own dictionary keep it.
+
+        Args:
+            lang: The language whose dictionaries will be updated.
+            frequencies: Every ``(term, reading, frequency)`` of the new list.
+            progress: Called with ``(finished_steps, total_steps)`` as work completes.
+            is_cancelled: Polled while statements run. Return True to stop early.
+            dictNames: If given, only update these tables of ``lang``.
+
+        Returns:
+            True if every dictionary was updated, False if the user cancelled. When
+            cancelled, no dictionary is modified.
+
+        """
+        self._c.execute(
+            "SELECT dictname, lid FROM dictnames INNER JOIN langnames ON langnames.id = dictnames.lid WHERE langname = ?;",
+            (lang,),
+        )
+        tables = [self._formatDictName(lid, name) for name, lid in self._c.fetchall()]
+
+        if dictNames is not None:
+            tables = [table for table in tables if table in dictNames]
+
+        total = len(tables) + 1
+
+        def _report(finished: int) -> None:
+            if progress:
+                progress(finished, total)
+
+        def _handler() -> int:
+            if is_cancelled and is_cancelled():
+                return 1
+
+            return 0
+
+        self._conn.set_progress_handler(_handler, _PROGRESS_HANDLER_INSTRUCTIONS)
+
+        try:
+            self._c.execute(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS frequency_recompute (
+                    term TEXT NOT NULL,
+                    reading TEXT NOT NULL,
+                    frequency INTEGER NOT NULL,
+                    PRIMARY KEY (term, reading)
+                ) WITHOUT ROWID
+                """
+            )
+            self._c.execute("DELETE FROM frequency_recompute;")
+            self._c.executemany(
+                "INSERT OR REPLACE INTO frequency_recompute (term, reading, frequency) VALUES (?, ?, ?);",
+                frequencies,
+            )
+            _report(1)
+
+            for index, table in enumerate(tables, start=2):
+                # NOTE: Rows that are no longer in the list fall back to "unknown".
+                self._c.execute(
+                    "UPDATE "
+                    + table
+                    + " SET frequency = ?, starCount = NULL WHERE dictFrequency IS NULL AND frequency IS NOT ? AND NOT EXISTS ("
+                    "SELECT 1 FROM frequency_recompute AS f WHERE f.term = "
+                    + table
+                    + ".term AND f.reading = "
+                    + table
+                    + ".pronunciation);",
+                    (_NOT_SET_FREQUENCY, _NOT_SET_FREQUENCY),
+                )
+                self._c.execute(
+                    "UPDATE "
+                    + table
+                    + " SET frequency = f.frequency, starCount = NULL"
+                    + " FROM frequency_recompute AS f WHERE f.term = "
+                    + table
+                    + ".term AND f.reading = "
+                    + table
+                    + ".pronunciation AND "
+                    + table
+                    + ".dictFrequency IS NULL AND "
+                    + table
+                    + ".frequency IS NOT f.frequency;"
+                )
+                _report(index)
+        except sqlite3.OperationalError:
+            self._conn.rollback()
+
+            if is_cancelled and is_cancelled():
+                _LOGGER.info('Frequency recompute for "%s" was cancelled.', lang)
+
+                return False
+
+            raise
+        finally:
+            self._conn.set_progress_handler(None, 0)
+            self._c.execute("DROP TABLE IF EXISTS temp.frequency_recompute;")
+
+        self.commitChanges()
+
+        return True
+
     def setFieldsSetting(self, name: str, fields: str) -> None:
         self._c.execute(
             "UPDATE dictnames SET fields = ? WHERE dictname=?", (fields, name)
@@ -618,6 +1474,117 @@ class DictDB:
     def commitChanges(self) -> None:
         self._conn.commit()
 
+    def rollbackChanges(self) -> None:
+        self._conn.rollback()
+
+
+def createDictionaryTable(cursor: sqlite3.Cursor, text: str) -> None:
+    """Create the table ``text`` and the indexes that every dictionary uses."""
+    cursor.execute(
+        "CREATE TABLE  IF NOT EXISTS  "
+        + text
+        + "(term CHAR(40) NOT NULL, altterm CHAR(40), pronunciation CHAR(100), pos CHAR(40), definition TEXT, examples TEXT, audio TEXT, frequency MEDIUMINT, starCount TEXT, hash INTEGER, pitch TEXT, dictFrequency MEDIUMINT);"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS it" + text + " ON " + text + " (term);")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS itp"
+        + text
+        + " ON "
+        + text
+        + " ( term, pronunciation );"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ia" + text + " ON " + text + " (altterm);"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS iap"
+        + text
+        + " ON "
+        + text
+        + " ( altterm, pronunciation );"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ia" + text + " ON " + text + " (pronunciation);"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ih" + text + " ON " + text + " (hash);")
+
+
+def insertDictionaryRows(
+    cursor: sqlite3.Cursor,
+    text: str,
+    dictionaryData: typing.Iterable[DictionaryRow],
+    name: str,
+) -> tuple[int, int]:
+    """Add rows, as made by the dictionary importer, to the dictionary table ``text``.
+
+    Rows whose content repeats an earlier row are dropped.
+
+    Args:
+        cursor: The database of ``text``.
+        text: The table to add to.
+        dictionaryData: The rows to add.
+        name: The user-facing name of the dictionary, for messages.
+
+    Returns:
+        The number of inserted rows and of dropped duplicates.
+
+    """
+    deduplicator = _Deduplicator(cursor.connection, name)
+
+    try:
+        cursor.executemany(
+            "INSERT INTO "
+            + text
+            + " ("
+            + _ROW_COLUMNS
+            + ", hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+            _encodeRows(deduplicator.hashRows(dictionaryData)),
+        )
+    finally:
+        duplicates = deduplicator.close()
+
+    return cursor.rowcount, duplicates
+
+
+def _encodeRows(
+    rows: typing.Iterable[tuple[typing.Any, ...]],
+) -> abc.Iterator[tuple[typing.Any, ...]]:
+    """Compress the long definitions of ``rows``, which are in ``_ROW_COLUMNS`` order."""
+    for row in rows:
+        definition = row[4]
+
+        # NOTE: A character is at most 4 bytes, so shorter text is never encoded
+        if definition and len(definition) * 4 >= _COMPRESSED_DEFINITION_SIZE:
+            data = definition.encode("utf-8")
+
+            if len(data) >= _COMPRESSED_DEFINITION_SIZE:
+                compressed = zlib.compress(data)
+
+                if len(compressed) < len(data):
+                    row = (*row[:4], compressed, *row[5:])
+
+        yield row
+
+
+def decodeDefinition(definition: typing.Union[str, bytes, None]) -> str:
+    """Get the text of a ``definition`` column, which may be compressed."""
+    if isinstance(definition, bytes):
+        return zlib.decompress(definition).decode("utf-8")
+
+    return definition or ""
+
+
+def _hashEntry(*fields: typing.Any) -> int:
+    """Get a 64-bit content hash that SQLite can store as an INTEGER.
+
+    NULL / None fields hash like empty text, never like the text "None".
+
+    """
+    text = "\x1f".join("" if field is None else str(field) for field in fields)
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+    return int.from_bytes(digest, "little", signed=True)
+
 
 def get() -> DictDB:
     if _INSTANCE:
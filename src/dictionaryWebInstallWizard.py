@@ -1,22 +1,41 @@
-import io
+import functools
 import json
 import logging
 import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
 import typing
+import zipfile
+from concurrent import futures
 
 import aqt
-from anki import httpclient
 from aqt import qt
 from PyQt6 import QtGui
 from PyQt6.QtCore import Qt
 
-from . import dictdb, migaku_wizard, typer, webConfig
+from . import dictdb, download_cache, migaku_wizard, typer, webConfig
 
 addon_path = os.path.dirname(__file__)
 
 _LOGGER = logging.getLogger(__name__)
 T = typing.TypeVar("T")
 
+# NOTE: How many files may download at the same time during an install.
+_DOWNLOAD_WORKERS = 2
+# NOTE: How many dictionaries may be converted into staging packs at the same time.
+# One core is left for Anki and for merging the finished packs.
+#
+_STAGING_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+_CLI_PATH = os.path.join(addon_path, "dictionary_cli.py")
+# NOTE: Packaged Anki builds may not run on a plain Python interpreter. Then the
+# staging packs are built on threads of this process instead.
+#
+_CAN_SPAWN_PYTHON = os.path.basename(sys.executable).lower().startswith("python")
+
 
 class NoAutoSelectLineEdit(qt.QLineEdit):
 
@@ -475,7 +494,71 @@ class DictionaryInstallPage(migaku_wizard.MiWizardPage[DictionaryWebInstallWizar
         self.install_thread.start()
 
 
+class _DictionaryDownload(typing.NamedTuple):
+    position: int
+    language: str
+    name: str
+    url: str
+
+
+class _InstallStep(typing.NamedTuple):
+    message: str
+    future: futures.Future[str]
+    dictionary: typing.Optional[_DictionaryDownload] = None
+    staged: typing.Optional[futures.Future[str]] = None
+
+
+class _InstallProgress:
+    """Combine the download bytes and imported rows of every dictionary into one value.
+
+    Each dictionary counts for one unit, half of it for downloading and half for
+    importing. Updates may come from several threads at once.
+
+    """
+
+    def __init__(self, count: int, emit: typing.Callable[[int], None]) -> None:
+        super().__init__()
+
+        self._count = count
+        self._emit = emit
+        self._downloads = [0.0] * count
+        self._imports = [0.0] * count
+        self._lock = threading.Lock()
+        self._last = -1
+
+    def _update(self) -> None:
+        if not self._count:
+            return
+
+        total = sum(self._downloads) + sum(self._imports)
+        percent = int(total * 50 / self._count)
+
+        if percent != self._last:
+            self._last = percent
+            self._emit(percent)
+
+    def set_download(self, index: int, finished: int, total: int) -> None:
+        with self._lock:
+            self._downloads[index] = finished / total if total else 0.0
+            self._update()
+
+    def set_import(self, index: int, finished: int, total: int) -> None:
+        with self._lock:
+            self._downloads[index] = 1.0
+            self._imports[index] = finished / total if total else 1.0
+            self._update()
+
+
 class InstallThread(qt.QThread):
+    """Download and import dictionaries from a dictionary server.
+
+    Downloads stream into the download cache in a small worker pool. Each finished
+    dictionary is converted into a private staging pack by a separate Python process,
+    several at a time, while this thread merges the finished packs into the database
+    in install order. The database is only written during the merges. Files that did
+    not change on the server are not downloaded again.
+
+    """
 
     progress_update = qt.pyqtSignal(int)
     log_update = qt.pyqtSignal(str)
@@ -503,24 +586,38 @@ class InstallThread(qt.QThread):
             return self._server_root + url
         return url
 
-    def run(self) -> None:
-        from . import dictionaryManager
+    def _download(
+        self,
+        url: str,
+        dst_path: typing.Optional[str] = None,
+        progress: typing.Optional[download_cache.ProgressCallback] = None,
+    ) -> str:
+        """Get ``url`` from the download cache and optionally copy it to ``dst_path``.
+
+        Raises:
+            download_cache.DownloadError: If the server does not respond with the file.
+            download_cache.DownloadCancelled: If the user cancelled while downloading.
+
+        Returns:
+            The path of the downloaded file.
+
+        """
+        path = download_cache.fetch(
+            url, progress=progress, is_cancelled=lambda: self.cancel_requested
+        )
 
-        client = httpclient.HttpClient()
+        if dst_path is None:
+            return path
 
-        num_dicts = 0
-        num_installed = 0
+        part_path = dst_path + ".part"
+        shutil.copyfile(path, part_path)
+        os.replace(part_path, dst_path)
 
-        def update_dict_progress(amt: typing.Union[float, int]) -> None:
-            progress = 0
-            if num_dicts > 0:
-                progress = num_installed // num_dicts
-                progress += int(amt // num_dicts)
-            progress_percent = round(progress * 100)
-            self.progress_update.emit(progress_percent)
+        return dst_path
 
-        for l in self._install_index:
-            num_dicts += len(l.get("dictionaries", []))
+    def run(self) -> None:
+        num_dicts = sum(len(l.get("dictionaries", [])) for l in self._install_index)
+        progress = _InstallProgress(num_dicts, self.progress_update.emit)
 
         self.log_update.emit("Installing %d dictionaries..." % num_dicts)
 
@@ -530,10 +627,39 @@ class InstallThread(qt.QThread):
         conj_path = os.path.join(addon_path, "user_files", "db", "conjugation")
         os.makedirs(conj_path, exist_ok=True)
 
-        for l in self._install_index:
-            if self.cancel_requested:
-                return
+        pool = futures.ThreadPoolExecutor(max_workers=_DOWNLOAD_WORKERS)
+        staging = futures.ThreadPoolExecutor(max_workers=_STAGING_WORKERS)
+        staging_path = tempfile.mkdtemp(prefix="migaku_staging_")
+
+        try:
+            steps = self._submit_downloads(
+                pool, staging, staging_path, progress, freq_path, conj_path
+            )
+            self._import_downloads(steps, progress)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            staging.shutdown(wait=True, cancel_futures=True)
+            shutil.rmtree(staging_path, ignore_errors=True)
+
+        if self.cancel_requested:
+            return
 
+        self.progress_update.emit(100)
+        self.log_update.emit("All done.")
+
+    def _submit_downloads(
+        self,
+        pool: futures.ThreadPoolExecutor,
+        staging: futures.ThreadPoolExecutor,
+        staging_path: str,
+        progress: _InstallProgress,
+        freq_path: str,
+        conj_path: str,
+    ) -> list[_InstallStep]:
+        steps: list[_InstallStep] = []
+        index = 0
+
+        for l in self._install_index:
             lname = self._force_lang
             if not lname:
                 lname = l.get("name_en")
@@ -548,75 +674,237 @@ class InstallThread(qt.QThread):
                 pass
 
             # Install frequency data
-            if self._install_freq:
-                furl = l.get("frequency_url")
-                if furl:
-                    self.log_update.emit("Installing %s frequency data..." % lname)
-                    furl = self._construct_url(furl)
-                    dl_resp = client.get(furl)
-                    if dl_resp.status_code == 200:
-                        fdata = client.stream_content(dl_resp)
-                        dst_path = os.path.join(freq_path, "%s.json" % lname)
-                        with open(dst_path, "wb") as f:
-                            f.write(fdata)
-                    else:
-                        self.log_update.emit(
-                            " ERROR: Download failed (%d)." % dl_resp.status_code
-                        )
+            furl = l.get("frequency_url")
+            if self._install_freq and furl:
+                dst_path = os.path.join(freq_path, "%s.json" % lname)
+                future = pool.submit(
+                    self._download, self._construct_url(furl), dst_path
+                )
+                steps.append(
+                    _InstallStep("Installing %s frequency data..." % lname, future)
+                )
 
             # Install conjugation data
-            if self._install_conj:
-                curl = l.get("conjugation_url")
-                if curl:
-                    self.log_update.emit("Installing %s conjugation data..." % lname)
-                    curl = self._construct_url(curl)
-                    dl_resp = client.get(curl)
-                    if dl_resp.status_code == 200:
-                        cdata = client.stream_content(dl_resp)
-                        dst_path = os.path.join(conj_path, "%s.json" % lname)
-                        with open(dst_path, "wb") as f:
-                            f.write(cdata)
-                    else:
-                        self.log_update.emit(
-                            " ERROR: Download failed (%d)." % dl_resp.status_code
-                        )
+            curl = l.get("conjugation_url")
+            if self._install_conj and curl:
+                dst_path = os.path.join(conj_path, "%s.json" % lname)
+                future = pool.submit(
+                    self._download, self._construct_url(curl), dst_path
+                )
+                steps.append(
+                    _InstallStep("Installing %s conjugation data..." % lname, future)
+                )
 
             # Install dictionaries
             for d in l.get("dictionaries", []):
-                if self.cancel_requested:
-                    return
-
                 dname = d["name"]
                 durl = self._construct_url(d["url"])
+                future = pool.submit(
+                    self._download,
+                    durl,
+                    progress=functools.partial(progress.set_download, index),
+                )
+                staged = staging.submit(
+                    self._stage,
+                    dname,
+                    future,
+                    os.path.join(staging_path, "%d.sqlite" % index),
+                    functools.partial(progress.set_import, index, 1, 2),
+                )
+                steps.append(
+                    _InstallStep(
+                        "Installing %s..." % dname,
+                        future,
+                        _DictionaryDownload(index, lname, dname, durl),
+                        staged,
+                    )
+                )
+                index += 1
 
-                self.log_update.emit("Installing %s..." % dname)
+            # Only once language can be installed when language is forced
+            if self._force_lang:
+                # Should never happen
+                break
 
-                self.log_update.emit(" Downloading %s..." % durl)
-                dl_resp = client.get(durl)
+        return steps
 
-                if dl_resp.status_code == 200:
-                    update_dict_progress(0.5)
-                    self.log_update.emit(" Importing...")
-                    ddata = client.stream_content(dl_resp)
-                    try:
-                        dictionaryManager.importDict(lname, io.BytesIO(ddata), dname)
-                    except ValueError as e:
-                        self.log_update.emit(" ERROR: %s" % str(e))
+    def _stage(
+        self,
+        name: str,
+        download: futures.Future[str],
+        pack_path: str,
+        on_staged: typing.Callable[[], None],
+    ) -> str:
+        """Convert the dictionary zip of ``download`` into a staging pack.
+
+        A pack that could not be finished is deleted, the zip is imported instead.
+
+        Args:
+            name: The user-facing name of the dictionary.
+            download: The pending download of the dictionary zip.
+            pack_path: The staging pack to write.
+            on_staged: Called once the pack is written.
+
+        Raises:
+            download_cache.DownloadCancelled: If the user cancelled the install.
+            ValueError: If the zip could not be converted.
+
+        Returns:
+            ``pack_path``.
+
+        """
+        path = download.result()
+
+        if self.cancel_requested:
+            raise download_cache.DownloadCancelled()
+
+        try:
+            if _CAN_SPAWN_PYTHON:
+                self._run_packer(name, path, pack_path)
+            else:
+                from . import dictionary_importer
+
+                dictionary_importer.buildPack(path, pack_path)
+        except BaseException:
+            # NOTE: A killed or crashed packer leaves its half-written pack behind
+            if os.path.isfile(pack_path):
+                os.remove(pack_path)
+
+            raise
+
+        on_staged()
+
+        return pack_path
+
+    def _run_packer(self, name: str, path: str, pack_path: str) -> None:
+        """Run :func:`dictionary_importer.buildPack` in a new Python process.
+
+        The pack is built by the add-on's command line, which needs no Anki, so the
+        conversion of each dictionary gets a core of its own.
+
+        """
+        process = subprocess.Popen(
+            [sys.executable, "-I", _CLI_PATH, "pack", path, pack_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+
+        while True:
+            try:
+                output, _ = process.communicate(timeout=0.5)
+            except subprocess.TimeoutExpired:
+                if self.cancel_requested:
+                    process.kill()
+                    process.communicate()
+
+                    raise download_cache.DownloadCancelled()
+            else:
+                break
+
+        if process.returncode:
+            _LOGGER.warning(
+                'Packing "%s" failed (%d), importing its zip instead:\n%s',
+                name,
+                process.returncode,
+                output.strip(),
+            )
+            lines = output.strip().splitlines()
+
+            raise ValueError(
+                lines[-1] if lines else "Packing failed (%d)." % process.returncode
+            )
+
+    def _import_downloads(
+        self, steps: typing.Iterable[_InstallStep], progress: _InstallProgress
+    ) -> None:
+        from . import dictionary_importer
+
+        for step in steps:
+            if self.cancel_requested:
+                return
+
+            self.log_update.emit(step.message)
+
+            if step.dictionary:
+                self.log_update.emit(" Downloading %s..." % step.dictionary.url)
+
+            try:
+                path = step.future.result()
+            except download_cache.DownloadCancelled:
+                return
+            except Exception as e:
+                self.log_update.emit(" ERROR: %s" % str(e))
+
+                if step.dictionary:
+                    progress.set_import(step.dictionary.position, 1, 1)
+
+                continue
+
+            if not step.dictionary:
+                continue
+
+            dictionary = step.dictionary
+
+            def _update_import(finished: int, total: int, rows: int) -> None:
+                progress.set_import(dictionary.position, finished, total)
+
+            source = path
+
+            if step.staged:
+                try:
+                    source = step.staged.result()
+                except download_cache.DownloadCancelled:
+                    return
+                except (Exception, futures.CancelledError):
+                    # NOTE: The zip is imported here instead, which reports any error
+                    _LOGGER.info('Staging "%s" failed.', dictionary.name, exc_info=True)
+
+            try:
+                if dictdb.get().hasDict(dictionary.name.replace(" ", "_")):
+                    self.log_update.emit(" Updating...")
+                    inserted, deleted, duplicates = dictionary_importer.updateDict(
+                        dictionary.language,
+                        source,
+                        dictionary.name,
+                        progress=_update_import,
+                    )
+                    self.log_update.emit(
+                        " Added %d and removed %d entries (%d duplicates dropped)."
+                        % (inserted, deleted, duplicates)
+                    )
                 else:
+                    self.log_update.emit(" Importing...")
+                    rows, duplicates = dictionary_importer.importDict(
+                        dictionary.language,
+                        source,
+                        dictionary.name,
+                        progress=_update_import,
+                    )
                     self.log_update.emit(
-                        " ERROR: Download failed (%d)." % dl_resp.status_code
+                        " Imported %d entries (%d duplicates dropped)."
+                        % (rows, duplicates)
                     )
 
-                update_dict_progress(1.0)
-                num_installed += 1
-
-            # Only once language can be installed when language is forced
-            if self._force_lang:
-                # Should never happen
-                break
+                if source != path:
+                    dictionary_importer.installMedia(path, dictionary.name)
+            except (ValueError, OSError, sqlite3.Error, zipfile.BadZipFile) as e:
+                _LOGGER.warning(
+                    'Installing "%s" failed.', dictionary.name, exc_info=True
+                )
+                self.log_update.emit(
+                    ' ERROR: Installing "%s" failed: %s' % (dictionary.name, str(e))
+                )
+            finally:
+                if source != path:
+                    try:
+                        os.remove(source)
+                    except OSError:
+                        _LOGGER.warning('Unable to remove "%s".', source)
 
-        self.progress_update.emit(100)
-        self.log_update.emit("All done.")
+            progress.set_import(dictionary.position, 1, 1)
 
 
 def _verify(value: typing.Optional[T]) -> T:
@@ -0,0 +1,489 @@
+"""Import dictionaries, frequency and conjugation data without Anki.
+
+This is meant for profiling the importer and for batch-converting many dictionaries
+at once. It only needs Python's standard library. Run it as a script:
+
+    python dictionary_cli.py import --database dictionaries.sqlite \\
+        --language Japanese --frequency Japanese.json JMdict.zip KANJIDIC.zip
+
+    python dictionary_cli.py pack JMdict.zip JMdict.sqlite
+
+    python dictionary_cli.py profile JMdict.zip
+
+    python dictionary_cli.py benchmark --entries 2000
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import types
+import typing
+from collections import abc
+
+_LOGGER = logging.getLogger(__name__)
+# NOTE: The add-on's __init__.py imports Anki, so the CLI loads this folder as a
+# package of its own instead.
+#
+_PACKAGE_NAME = "_migaku_dictionary_cli"
+_BENCHMARK_LANGUAGE = "Benchmark"
+_BENCHMARK_TERM = "食べ"
+# NOTE: What a deinflecting search highlights, besides the searched term
+_BENCHMARK_INFLECTIONS = ("食べる", "食べます")
+# NOTE: A result tab asks for the definitions of this many entries at once, see
+# ``RESULT_CHUNK_SIZE`` in dictionaryInit.html.
+#
+_BODY_BATCH_SIZE = 50
+
+
+class _Dependencies(typing.NamedTuple):
+    dictdb: types.ModuleType
+    dictionary_importer: types.ModuleType
+    highlighter: types.ModuleType
+    search_results: types.ModuleType
+
+
+def _get_dependencies() -> _Dependencies:
+    if __package__:
+        package = __package__
+    else:
+        package = _PACKAGE_NAME
+
+        if package not in sys.modules:
+            module = types.ModuleType(package)
+            module.__path__ = [os.path.dirname(os.path.realpath(__file__))]
+            sys.modules[package] = module
+
+    return _Dependencies(
+        importlib.import_module(".dictdb", package),
+        importlib.import_module(".dictionary_importer", package),
+        importlib.import_module(".highlighter", package),
+        importlib.import_module(".search_results", package),
+    )
+
+
+def _get_peak_memory() -> typing.Optional[int]:
+    """Get the highest resident memory of this process, in bytes, if it is known."""
+    try:
+        import resource
+    except ImportError:  # NOTE: Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # NOTE: Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _get_table_sizes(
+    connection: sqlite3.Connection,
+) -> list[tuple[str, int, typing.Optional[int]]]:
+    """Get the ``(name, rows, bytes)`` of every table and index of ``connection``.
+
+    The bytes are None if SQLite was built without the ``dbstat`` table.
+
+    """
+    cursor = connection.cursor()
+    names = [
+        name
+        for (name,) in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%' ORDER BY name;"
+        )
+    ]
+
+    try:
+        sizes = dict(
+            cursor.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name;")
+        )
+    except sqlite3.OperationalError:
+        sizes = {}
+
+    indexes: dict[str, list[str]] = {}
+
+    for name, table in cursor.execute(
+        "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index';"
+    ):
+        indexes.setdefault(table, []).append(name)
+
+    output: list[tuple[str, int, typing.Optional[int]]] = []
+
+    for name in names:
+        (rows,) = cursor.execute('SELECT COUNT(*) FROM "%s";' % name).fetchone()
+        size: typing.Optional[int] = None
+
+        if sizes:
+            size = sizes.get(name, 0) + sum(
+                sizes.get(index, 0) for index in indexes.get(name, [])
+            )
+
+        output.append((name, rows, size))
+
+    return output
+
+
+def _format_bytes(size: typing.Optional[float]) -> str:
+    if size is None:
+        return "?"
+
+    return "%.1f MB" % (size / 1024 / 1024)
+
+
+def _copy_language_file(directory: str, kind: str, lang: str, path: str) -> None:
+    destination = os.path.join(directory, kind)
+    os.makedirs(destination, exist_ok=True)
+    shutil.copyfile(path, os.path.join(destination, "%s.json" % lang))
+    print('Copied %s data "%s".' % (kind, path))
+
+
+def _import(namespace: argparse.Namespace) -> int:
+    dependencies = _get_dependencies()
+    dictdb = dependencies.dictdb
+    dictionary_importer = dependencies.dictionary_importer
+
+    db = dictdb.DictDB(namespace.database)
+    dictdb.initialize(db)
+    lang: str = namespace.language
+
+    try:
+        if lang not in db.getCurrentDbLangs():
+            db.addLanguages([lang])
+
+        directory = db.getDirectory()
+
+        if namespace.frequency:
+            _copy_language_file(directory, "frequency", lang, namespace.frequency)
+
+        if namespace.conjugation:
+            _copy_language_file(directory, "conjugation", lang, namespace.conjugation)
+
+        failed = 0
+        total_rows = 0
+        total_bytes = 0
+        total_seconds = 0.0
+
+        for path in namespace.dictionaries:
+            name = os.path.splitext(os.path.basename(path))[0]
+            size = os.path.getsize(path)
+            start = time.perf_counter()
+
+            try:
+                rows, duplicates = dictionary_importer.importDict(lang, path, name)
+            except Exception as error:
+                _LOGGER.info("Import of %s failed.", path, exc_info=True)
+                print('Failed "%s": %s' % (path, error))
+                failed += 1
+
+                continue
+
+            seconds = time.perf_counter() - start
+            total_rows += rows
+            total_bytes += size
+            total_seconds += seconds
+            print(
+                "%s: %d rows in %.2fs (%d rows/s, %s/s), %d duplicates dropped"
+                % (
+                    name,
+                    rows,
+                    seconds,
+                    rows / seconds if seconds else 0,
+                    _format_bytes(size / seconds if seconds else 0),
+                    duplicates,
+                )
+            )
+
+        if total_seconds:
+            print(
+                "Total: %d rows in %.2fs (%d rows/s, %s/s)"
+                % (
+                    total_rows,
+                    total_seconds,
+                    total_rows / total_seconds,
+                    _format_bytes(total_bytes / total_seconds),
+                )
+            )
+    finally:
+        db.closeConnection()
+        dictdb.clear()
+
+    print("Peak memory: %s" % _format_bytes(_get_peak_memory()))
+    print("Tables:")
+
+    connection = sqlite3.connect(namespace.database)
+
+    try:
+        for table, rows, table_size in _get_table_sizes(connection):
+            print("    %s: %d rows, %s" % (table, rows, _format_bytes(table_size)))
+    finally:
+        connection.close()
+
+    print("Database: %s" % _format_bytes(os.path.getsize(namespace.database)))
+
+    return 1 if failed else 0
+
+
+def _pack(namespace: argparse.Namespace) -> int:
+    dictionary_importer = _get_dependencies().dictionary_importer
+    start = time.perf_counter()
+
+    try:
+        rows = dictionary_importer.buildPack(namespace.source, namespace.destination)
+    except ValueError as error:
+        print(error)
+
+        return 1
+
+    seconds = time.perf_counter() - start
+    print(
+        'Packed %d rows into "%s" in %.2fs (%s).'
+        % (
+            rows,
+            namespace.destination,
+            seconds,
+            _format_bytes(os.path.getsize(namespace.destination)),
+        )
+    )
+    print("Peak memory: %s" % _format_bytes(_get_peak_memory()))
+
+    return 0
+
+
+def _profile(namespace: argparse.Namespace) -> int:
+    dictionary_importer = _get_dependencies().dictionary_importer
+
+    for path in namespace.dictionaries:
+        profile = dictionary_importer.profileDict(path)
+        entries = profile.entries or 1
+        print("%s: %d entries" % (path, profile.entries))
+
+        for stage in ("read", "parse", "deserialize", "normalize"):
+            seconds = getattr(profile, stage)
+            print(
+                "    %s: %.2fs (%.2f us/entry)"
+                % (stage, seconds, seconds * 1000000 / entries)
+            )
+
+    return 0
+
+
+def _get_benchmark_rows(count: int) -> abc.Iterator[list[typing.Optional[str]]]:
+    """Yield ``count`` made-up rows, with markup, example sentences and media."""
+    for index in range(count):
+        sense = (
+            '<span class="gloss">to eat; to live on (e.g. a salary)</span> '
+            "「毎朝パンを%sます。」"
+            '<img data-media="img/%d.png"> <b>%d</b>' % (_BENCHMARK_TERM, index, index)
+        )
+        yield [
+            "%s%d" % (_BENCHMARK_TERM, index),
+            "",
+            "たべる",
+            "v1 vt",
+            "<br>".join([sense] * 10),
+            "",
+            "",
+            str(index),
+            None,
+            None,
+            None,
+        ]
+
+
+def _time_best(repeat: int, function: typing.Callable[[], typing.Any]) -> float:
+    """Call ``function`` ``repeat`` times and get its fastest time, in seconds."""
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def _benchmark(namespace: argparse.Namespace) -> int:
+    dependencies = _get_dependencies()
+    search_results = dependencies.search_results
+    count: int = namespace.entries
+    directory = tempfile.mkdtemp()
+    db = dependencies.dictdb.DictDB(os.path.join(directory, "benchmark.sqlite"))
+
+    try:
+        db.addLanguages([_BENCHMARK_LANGUAGE])
+        db.addDict("benchmark", _BENCHMARK_LANGUAGE, '["term"]')
+        table = db.getDictTable("benchmark")
+        db.importToDict(table, _get_benchmark_rows(count))
+        db.indexExamples(table)
+        results, _ = db.searchTerm(
+            _BENCHMARK_TERM,
+            {"dictionaries": [{"dict": table, "lang": _BENCHMARK_LANGUAGE}]},
+            {},
+            "Forward",
+            False,
+            str(count),
+            count,
+        )
+        targets = [_BENCHMARK_TERM, *_BENCHMARK_INFLECTIONS]
+        highlight = dependencies.highlighter.Highlighter(targets, True, True)
+        stored = search_results.StoredResults(
+            highlight,
+            [
+                (dictName, entry)
+                for dictName, dictResults in results.items()
+                for entry in dictResults
+            ],
+        )
+
+        def _serialize_headers() -> None:
+            json.dumps(
+                [
+                    {
+                        "name": dictName,
+                        "entries": [
+                            search_results.get_result_entry(highlight, entry)
+                            for entry in dictResults
+                        ],
+                    }
+                    for dictName, dictResults in results.items()
+                ],
+                ensure_ascii=False,
+            )
+
+        definitions = [
+            definition
+            for dictName, dictResults in results.items()
+            for definition in db.getDefinitions(
+                dictName, [entry["rowid"] for entry in dictResults]
+            ).values()
+        ]
+
+        def _highlight() -> None:
+            compiled = dependencies.highlighter.Highlighter(targets, True, True)
+
+            for definition in definitions:
+                compiled.highlight(definition["definition"], definition["exampleSpans"])
+
+        def _render_bodies() -> None:
+            for start in range(0, len(stored.entries), _BODY_BATCH_SIZE):
+                search_results.get_result_bodies(
+                    db, stored, start, start + _BODY_BATCH_SIZE
+                )
+
+        entries = len(stored.entries) or 1
+        print("%d entries, best of %d runs:" % (len(stored.entries), namespace.repeat))
+
+        for stage, function in (
+            ("headers", _serialize_headers),
+            ("highlighter", _highlight),
+            ("bodies", _render_bodies),
+        ):
+            seconds = _time_best(namespace.repeat, function)
+            print(
+                "    %s: %.2fms (%.2f us/entry)"
+                % (stage, seconds * 1000, seconds * 1000000 / entries)
+            )
+    finally:
+        db.closeConnection()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return 0
+
+
+def _parse_arguments(text: typing.Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Import dictionaries into a Migaku Dictionary database, "
+        "without Anki.",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Print the importer's log messages."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    importer = subparsers.add_parser(
+        "import",
+        help="Import dictionary zips and dictionary packs into a database.",
+    )
+    importer.add_argument(
+        "--database",
+        required=True,
+        help="The SQLite file to import into. It is created if needed.",
+    )
+    importer.add_argument(
+        "--language",
+        required=True,
+        help="The language of the dictionaries. It is added if needed.",
+    )
+    importer.add_argument(
+        "--frequency",
+        help="A frequency list to install for the language before importing.",
+    )
+    importer.add_argument(
+        "--conjugation",
+        help="Conjugation data to install for the language.",
+    )
+    importer.add_argument(
+        "dictionaries",
+        nargs="+",
+        help="The zips / packs to import. Each file name becomes a dictionary name.",
+    )
+    importer.set_defaults(execute=_import)
+
+    packer = subparsers.add_parser(
+        "pack", help="Convert a dictionary zip into a dictionary pack."
+    )
+    packer.add_argument("source", help="The dictionary zip to convert.")
+    packer.add_argument("destination", help="The pack file to write.")
+    packer.set_defaults(execute=_pack)
+
+    profiler = subparsers.add_parser(
+        "profile",
+        help="Time each stage of importing dictionary zips, without a database.",
+    )
+    profiler.add_argument("dictionaries", nargs="+", help="The zips to profile.")
+    profiler.set_defaults(execute=_profile)
+
+    benchmark = subparsers.add_parser(
+        "benchmark",
+        help="Time how search results are rendered, over made-up entries.",
+    )
+    benchmark.add_argument(
+        "--entries", type=int, default=1000, help="The number of entries to render."
+    )
+    benchmark.add_argument(
+        "--repeat", type=int, default=5, help="How often to time each stage."
+    )
+    benchmark.set_defaults(execute=_benchmark)
+
+    return parser.parse_args(text)
+
+
+def main(text: typing.Optional[typing.Sequence[str]] = None) -> int:
+    """Run the command-line interface.
+
+    Args:
+        text: The arguments to parse. If omitted, ``sys.argv`` is used.
+
+    Returns:
+        The exit code, 0 if everything succeeded.
+
+    """
+    namespace = _parse_arguments(sys.argv[1:] if text is None else text)
+    logging.basicConfig(
+        level=logging.INFO if namespace.verbose else logging.WARNING,
+        format="%(levelname)s - %(message)s",
+    )
+
+    return typing.cast(int, namespace.execute(namespace))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1293 @@
+"""Convert Yomichan / Yomitan and Migaku dictionary archives into database rows.
+
+Nothing in this module needs Qt, so it can run inside of Anki as well as from scripts.
+
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import typing
+import zipfile
+from collections import abc
+from urllib import request
+
+from . import dictdb, typer, yomitan_type
+
+_DEFINITION_TABLE_SEPARATOR = ", "
+_NOT_SET_FREQUENCY = 999999  # NOTE: This means "not frequent or frequency is not known"
+_LOGGER = logging.getLogger(__name__)
+_FrequencyDict = dict[tuple[str, str], int]
+_PitchDict = dict[tuple[str, str], str]
+# NOTE: Definitions only point at their media. ``MIDict`` loads it once it is shown.
+# Until the definition is escaped, the path sits between private-use characters.
+#
+_MEDIA_MARKER = "\ue000{path}\ue001"
+_MEDIA_MARKER_EXPRESSION = re.compile("\ue000([^\ue001]*)\ue001")
+_MEDIA_TAG = '<img class="dictionaryMedia" data-media="{path}">'
+ImportProgressCallback = typing.Callable[[int, int, int], None]
+T = typing.TypeVar("T")
+
+# NOTE: Dictionary packs are SQLite files. Bump the format whenever their layout changes.
+_PACK_FORMAT = 3
+_PACK_HEADER = b"SQLite format 3\x00"
+
+# NOTE: The expected type of each field of a Yomichan / Yomitan term bank entry.
+# The definitions, index 5, are validated separately.
+#
+_ENTRY_TYPES = (str, str, str, str, int, list, int, str)
+# NOTE: The text fields of a Migaku dictionary entry. Only "term" and "definition" are
+# required.
+#
+_MIGAKU_FIELDS = ("term", "altterm", "pronunciation", "pos", "definition")
+
+
+class _FrequencyEntryValue(typing.TypedDict):
+    displayValue: str
+    value: int
+
+
+class _FrequencyReadingEntryValue(typing.TypedDict):
+    reading: str
+    frequency: _FrequencyEntryValue
+
+
+class ImportProfile(typing.NamedTuple):
+    """The seconds that each stage of an import took, see :func:`profileDict`."""
+
+    entries: int
+    read: float
+    parse: float
+    deserialize: float
+    normalize: float
+
+
+class _FlatDictionary:
+    """One term bank entry, reduced to the fields that the database stores.
+
+    Millions of these may exist at once during an import so the class is slotted and
+    only keeps what :meth:`serialize` needs.
+
+    """
+
+    __slots__ = (
+        "_term",
+        "_altterm",
+        "_reading",
+        "_tags",
+        "_definitions",
+        "_frequency",
+        "_dict_frequency",
+        "_pitch",
+    )
+
+    def __init__(
+        self,
+        term: str,
+        reading: str,
+        tags: str,
+        definitions: list[str],
+        altterm: str = "",
+    ) -> None:
+        self._term = term
+        self._altterm = altterm
+        self._reading = reading
+        self._tags = tags
+        self._definitions = definitions
+
+        # NOTE: This is an extra attribute that a dictionary would not define but we
+        # may be able to get from a frequency list and map manually, ourselves
+        #
+        self._frequency: typing.Optional[int] = None
+        # NOTE: Data from the dictionary's own term meta banks. Its frequency wins
+        # over the frequency list of the language.
+        #
+        self._dict_frequency: typing.Optional[int] = None
+        self._pitch = ""
+
+    @classmethod
+    def deserialize(
+        cls, data: list[typing.Union[str, int]]
+    ) -> typing.Optional[_FlatDictionary]:
+        # Example: ['πâ╜', 'πâ╜', 'n', '', 0, ['repetition mark in katakana'], 0, '']
+        if len(data) != 8 or not all(map(isinstance, data, _ENTRY_TYPES)):
+            _LOGGER.debug('Rejected "%s" data because its layout is unknown.', data)
+
+            return None
+
+        definitions = _get_definitions(data[5])
+
+        if not definitions:
+            _LOGGER.debug('Rejected "%s" data because it has no definitions.', data)
+
+            return None
+
+        return cls(
+            typing.cast(str, data[0]),
+            typing.cast(str, data[1]),
+            typing.cast(str, data[2]),
+            definitions,
+        )
+
+    @classmethod
+    def from_migaku(cls, data: typing.Any) -> typing.Optional[_FlatDictionary]:
+        # Example: {"term": "猫", "altterm": "", "pronunciation": "ねこ", "pos": "n",
+        #           "definition": "cat", "examples": "", "audio": ""}
+        #
+        if not isinstance(data, abc.Mapping) or not all(
+            isinstance(data.get(key, ""), str) for key in _MIGAKU_FIELDS
+        ):
+            _LOGGER.debug('Rejected "%s" data because its layout is unknown.', data)
+
+            return None
+
+        if not data.get("term") or not data.get("definition"):
+            _LOGGER.debug('Rejected "%s" data because it has no definition.', data)
+
+            return None
+
+        return cls(
+            data["term"],
+            data.get("pronunciation", ""),
+            data.get("pos", ""),
+            [data["definition"]],
+            altterm=data.get("altterm", ""),
+        )
+
+    def get_frequency(self) -> typing.Optional[int]:
+        return self._frequency
+
+    def get_reading(self) -> str:
+        if self._reading:
+            return self._reading
+
+        return self._term
+
+    def get_term(self) -> str:
+        return self._term
+
+    def clear_frequency(self) -> None:
+        self._frequency = None
+
+    def serialize(self) -> list[typing.Optional[str]]:
+        term = _getAdjustedTerm(self._term)
+        reading = _getAdjustedPronunciation(self._reading or self._term)
+        definitions = self._definitions
+        definition = _getAdjustedDefinition(
+            definitions[0]
+            if len(definitions) == 1
+            else _DEFINITION_TABLE_SEPARATOR.join(definitions)
+        )
+        dict_frequency: typing.Optional[str] = None
+
+        if self._dict_frequency is not None:
+            frequency = self._dict_frequency
+            dict_frequency = str(frequency)
+        elif self._frequency is not None:
+            frequency = self._frequency
+        else:
+            frequency = _NOT_SET_FREQUENCY
+
+        return [
+            term,
+            _getAdjustedTerm(self._altterm) if self._altterm else "",
+            reading,
+            self._tags,
+            definition,
+            "",
+            "",
+            str(frequency),
+            None,  # NOTE: The star count is derived from the frequency when it's read
+            self._pitch,
+            dict_frequency,
+        ]
+
+    def set_frequency(self, frequency: int) -> None:
+        self._frequency = frequency
+
+    def set_term_meta(self, frequency: typing.Optional[int], pitch: str) -> None:
+        """Add the frequency and pitch accents that the dictionary itself defines."""
+        self._dict_frequency = frequency
+        self._pitch = pitch
+
+
+def _get_dictionary_files(zfile: zipfile.ZipFile) -> tuple[list[str], bool]:
+    is_yomichan = any(name.startswith("term_bank_") for name in zfile.namelist())
+    dict_files: list[str] = []
+
+    for name in zfile.namelist():
+        if not name.endswith(".json") or name == "index.json":
+            continue
+
+        if is_yomichan and not name.startswith("term_bank_"):
+            continue
+
+        dict_files.append(name)
+
+    return _natural_sort(dict_files), is_yomichan
+
+
+def _get_media_files(zfile: zipfile.ZipFile) -> list[str]:
+    return [
+        info.filename
+        for info in zfile.infolist()
+        if not info.is_dir() and not info.filename.endswith(".json")
+    ]
+
+
+def _write_media(
+    zfile: zipfile.ZipFile, blob_path: str
+) -> typing.Optional[list[tuple[str, int, int]]]:
+    """Copy every media file of ``zfile`` into one file, back to back.
+
+    Args:
+        zfile: The dictionary archive.
+        blob_path: The file to write. It is only created if there is media.
+
+    Returns:
+        The ``(path, offset, size)`` of each media file, or None if there is none.
+
+    """
+    names = _get_media_files(zfile)
+
+    if not names:
+        return None
+
+    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+    media: list[tuple[str, int, int]] = []
+    offset = 0
+
+    with open(blob_path, "wb") as handler:
+        for name in names:
+            with zfile.open(name) as source:
+                shutil.copyfileobj(source, handler)
+
+            size = handler.tell() - offset
+            media.append((name, offset, size))
+            offset += size
+
+    return media
+
+
+def _install_media(zfile: zipfile.ZipFile, dict_name: str) -> None:
+    db = dictdb.get()
+    blob_path = db.getMediaPath(dict_name) + ".part"
+    media = _write_media(zfile, blob_path)
+
+    if media is None:
+        db.setMedia(dict_name, None, [])
+    else:
+        _LOGGER.info('Stored %d media files of "%s".', len(media), dict_name)
+        db.setMedia(dict_name, blob_path, media)
+
+
+def _get_meta_files(zfile: zipfile.ZipFile) -> list[str]:
+    return _natural_sort(
+        name
+        for name in zfile.namelist()
+        if name.startswith("term_meta_bank_") and name.endswith(".json")
+    )
+
+
+def _get_meta_frequency(value: typing.Any) -> typing.Optional[int]:
+    """Get the number of a term meta bank frequency, which has a few layouts.
+
+    Examples:
+        1234
+        "1234"
+        {"value": 1234, "displayValue": "1234㋕"}
+        {"reading": "それ", "frequency": {"value": 1234, "displayValue": "1234㋕"}}
+
+    """
+    if isinstance(value, bool):
+        return None
+
+    if isinstance(value, (int, float)):
+        return int(value)
+
+    if isinstance(value, str):
+        match = re.match(r"\s*(\d+)", value)
+
+        return int(match.group(1)) if match else None
+
+    if isinstance(value, abc.Mapping):
+        if "frequency" in value:
+            return _get_meta_frequency(value["frequency"])
+
+        if "value" in value:
+            return _get_meta_frequency(value["value"])
+
+    return None
+
+
+def _get_meta_pitch(value: typing.Any) -> typing.Optional[str]:
+    """Get the downstep positions of a term meta bank pitch, e.g. ``"0, 2"``."""
+    if not isinstance(value, abc.Mapping) or not isinstance(value.get("pitches"), list):
+        return None
+
+    positions = [
+        str(pitch["position"])
+        for pitch in value["pitches"]
+        if isinstance(pitch, abc.Mapping) and "position" in pitch
+    ]
+
+    return _DEFINITION_TABLE_SEPARATOR.join(positions) or None
+
+
+def _read_term_meta(
+    zfile: zipfile.ZipFile, meta_files: typing.Iterable[str]
+) -> tuple[_FrequencyDict, _PitchDict]:
+    """Read the frequencies and pitch accents of the term meta banks of ``zfile``.
+
+    Both are keyed by ``(term, reading)``. An empty reading means that the data
+    applies to every reading of the term.
+
+    """
+    is_occurrence_based = False
+
+    if "index.json" in zfile.namelist():
+        with zfile.open("index.json") as handler:
+            index = json.load(handler)
+
+        is_occurrence_based = (
+            isinstance(index, dict) and index.get("frequencyMode") == "occurrence-based"
+        )
+
+    frequencies: _FrequencyDict = {}
+    pitches: _PitchDict = {}
+
+    for filename in meta_files:
+        with zfile.open(filename, "r") as handler:
+            data = json.loads(handler.read())
+
+        if not isinstance(data, list):
+            _LOGGER.warning('Skipped "%s" because it is not a list.', filename)
+
+            continue
+
+        for item in data:
+            # Examples:
+            # ["の", "freq", {"value": 1, "displayValue": "1㋕"}]
+            # ["其", "pitch", {"reading": "それ", "pitches": [{"position": 0}]}]
+            #
+            if not isinstance(item, list) or len(item) != 3:
+                continue
+
+            term, mode, value = item
+            reading = value.get("reading", "") if isinstance(value, dict) else ""
+            key = (term, reading)
+
+            if mode == "freq":
+                frequency = _get_meta_frequency(value)
+
+                if frequency is None:
+                    continue
+
+                existing = frequencies.get(key)
+
+                if existing is None:
+                    frequencies[key] = frequency
+                elif is_occurrence_based:
+                    frequencies[key] = max(existing, frequency)
+                else:
+                    frequencies[key] = min(existing, frequency)
+            elif mode == "pitch":
+                pitch = _get_meta_pitch(value)
+
+                if pitch:
+                    pitches[key] = pitch
+
+    if is_occurrence_based:
+        # NOTE: Searches sort by frequency rank, so the most common term comes first
+        ordered = sorted(frequencies, key=frequencies.__getitem__, reverse=True)
+        frequencies = {key: rank for rank, key in enumerate(ordered, start=1)}
+
+    return frequencies, pitches
+
+
+def _apply_term_meta(
+    entries: typing.Iterable[_FlatDictionary],
+    frequencies: _FrequencyDict,
+    pitches: _PitchDict,
+) -> None:
+    for entry in entries:
+        term = entry.get_term()
+        key = (term, entry.get_reading())
+        frequency = frequencies.get(key)
+
+        if frequency is None:
+            frequency = frequencies.get((term, ""))
+
+        entry.set_term_meta(frequency, pitches.get(key) or pitches.get((term, ""), ""))
+
+
+def _read_term_bank(
+    zfile: zipfile.ZipFile,
+    filename: str,
+    deserialize: typing.Callable[
+        [typing.Any], typing.Optional[_FlatDictionary]
+    ] = _FlatDictionary.deserialize,
+) -> list[_FlatDictionary]:
+    with zfile.open(filename, "r") as jsonDictFile:
+        all_data = json.loads(jsonDictFile.read())
+
+    if not isinstance(all_data, abc.MutableSequence):
+        raise NotImplementedError(
+            f'Data "{type(all_data)}" is not supported yet. '
+            "Please ask the maintainer to add it!",
+        )
+
+    jsonDict: list[_FlatDictionary] = []
+
+    for entry in all_data:
+        converted = deserialize(entry)
+
+        if not converted:
+            _LOGGER.warning(
+                'Entry "%s" is not supported yet. '
+                "Please ask the maintainer to add it!",
+                entry,
+            )
+
+            continue
+
+        jsonDict.append(converted)
+
+    return jsonDict
+
+
+def _add_dictionary(lang_name: str, dict_name: str) -> str:
+    term_header = json.dumps(["term", "altterm", "pronunciation"])
+
+    try:
+        dictdb.get().addDict(dict_name, lang_name, term_header)
+    except Exception:
+        raise ValueError(
+            "Creating dictionary failed. "
+            "Make sure that no other dictionary with the same name exists. "
+            "Several special characters are also no supported in dictionary names."
+        )
+
+    return _recommend_table_name(lang_name, dict_name)
+
+
+def _is_pack(path: typing.Union[typing.BinaryIO, str]) -> bool:
+    if isinstance(path, str):
+        with open(path, "rb") as handler:
+            header = handler.read(len(_PACK_HEADER))
+    else:
+        position = path.tell()
+        header = path.read(len(_PACK_HEADER))
+        path.seek(position)
+
+    return header == _PACK_HEADER
+
+
+@contextlib.contextmanager
+def _get_pack_path(
+    path: typing.Union[typing.BinaryIO, str],
+) -> abc.Iterator[str]:
+    """Get a file path for ``path``, writing it to a temporary file if it's a stream."""
+    if isinstance(path, str):
+        yield path
+
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False) as handler:
+        shutil.copyfileobj(path, handler)
+
+    try:
+        yield handler.name
+    finally:
+        os.remove(handler.name)
+
+
+def _read_pack_metadata(pack_path: str) -> dict[str, str]:
+    uri = "file:" + request.pathname2url(os.path.abspath(pack_path)) + "?mode=ro"
+
+    try:
+        with contextlib.closing(sqlite3.connect(uri, uri=True)) as connection:
+            metadata = dict(connection.execute("SELECT key, value FROM metadata;"))
+    except sqlite3.DatabaseError as error:
+        raise ValueError(f'File "{pack_path}" is not a dictionary pack.') from error
+
+    if metadata.get("format") != str(_PACK_FORMAT):
+        raise ValueError(
+            f'Dictionary pack "{pack_path}" uses the unsupported '
+            f'"{metadata.get("format")}" format.'
+        )
+
+    return metadata
+
+
+def _read_pack_rows(
+    pack_path: str, lang_name: typing.Optional[str]
+) -> abc.Iterator[list[typing.Any]]:
+    """Yield the rows of a dictionary pack with the language's frequency list applied.
+
+    Rows with a frequency from the dictionary itself keep it.
+
+    """
+    frequency_dict: typing.Optional[_FrequencyDict] = None
+
+    if lang_name:
+        frequency_dict, _ = _load_frequency_dict(lang_name)
+
+    with contextlib.closing(sqlite3.connect(pack_path)) as connection:
+        for row in connection.execute(
+            "SELECT term, altterm, pronunciation, pos, definition, examples, audio, "
+            "frequency, starCount, pitch, dictFrequency FROM entries;"
+        ):
+            result = list(row)
+            result[4] = dictdb.decodeDefinition(row[4])
+
+            if frequency_dict and row[10] is None:
+                result[7] = frequency_dict.get((row[0], row[2]), _NOT_SET_FREQUENCY)
+
+            yield result
+
+
+def _install_pack(
+    lang_name: str,
+    path: typing.Union[typing.BinaryIO, str],
+    dict_name: str,
+    progress: typing.Optional[ImportProgressCallback],
+) -> tuple[int, int]:
+    db = dictdb.get()
+
+    with _get_pack_path(path) as pack_path:
+        metadata = _read_pack_metadata(pack_path)
+        table = _add_dictionary(lang_name, dict_name)
+
+        try:
+            rows = db.installPack(table, pack_path)
+            db.indexExamples(table)
+        except Exception:
+            db.deleteDict(table)
+
+            raise
+
+    _LOGGER.info(
+        'Installed "%s" pack of "%s" with %d rows.',
+        metadata.get("title"),
+        dict_name,
+        rows,
+    )
+
+    try:
+        frequencies = getFrequencyRows(lang_name)
+    except RuntimeError:
+        _LOGGER.info('Unable to get a frequency list for "%s" language.', lang_name)
+    else:
+        db.recomputeFrequencies(lang_name, frequencies, dictNames={table})
+
+    if progress:
+        progress(1, 1, rows)
+
+    # NOTE: Duplicates were already dropped when the pack was built
+    return rows, int(metadata.get("duplicates", 0))
+
+
+def _recommend_table_name(lang: str, dictName: str) -> str:
+    return "l" + str(dictdb.get().getLangId(lang)) + "name" + dictName
+
+
+def _natural_sort(l: typing.Iterable[str]) -> list[str]:
+    def convert(text: str) -> typing.Union[int, str]:
+        if text.isdigit():
+            return int(text)
+
+        return text
+
+    alphanum_key = lambda key: [convert(c) for c in re.split("([0-9]+)", key)]
+
+    return sorted(l, key=alphanum_key)
+
+
+def _load_frequency_dict(
+    lang_name: str,
+) -> tuple[typing.Optional[_FrequencyDict], bool]:
+    try:
+        return _getFrequencyDict(lang_name)
+    except RuntimeError:
+        _LOGGER.info('Unable to get a frequency list for "%s" language.', lang_name)
+
+    # TODO: @ColinKennedy not sure about this default value
+    return None, False
+
+
+def _read_dictionary_rows(
+    zfile: zipfile.ZipFile,
+    dict_files: typing.Sequence[str],
+    lang_name: typing.Optional[str],
+    progress: typing.Optional[ImportProgressCallback] = None,
+    is_yomichan: bool = True,
+) -> abc.Iterator[list[typing.Optional[str]]]:
+    """Yield the database rows of every term bank in ``dict_files``, one bank at a time.
+
+    The dictionary's own term meta banks, which are usually far smaller than its term
+    banks, are read first so that their frequencies and pitch accents are joined
+    onto each term bank while it streams. Every file of ``zfile`` is read only once.
+
+    Args:
+        zfile: The dictionary archive.
+        dict_files: The term banks to read, in order.
+        lang_name: The language whose frequency list is applied to the rows that the
+            dictionary has no frequency for, if any.
+        progress: Called with ``(finished_bytes, total_bytes, rows)`` after each term
+            bank. The bytes are the uncompressed size of the term and meta banks.
+        is_yomichan: If False, ``dict_files`` are read as Migaku dictionary files.
+
+    """
+    frequency_dict: typing.Optional[_FrequencyDict] = None
+    is_hyouki = False
+    deserialize = (
+        _FlatDictionary.deserialize if is_yomichan else _FlatDictionary.from_migaku
+    )
+
+    if lang_name:
+        frequency_dict, is_hyouki = _load_frequency_dict(lang_name)
+
+    meta_files = _get_meta_files(zfile)
+    total = sum(zfile.getinfo(name).file_size for name in [*meta_files, *dict_files])
+    meta_frequencies, meta_pitches = _read_term_meta(zfile, meta_files)
+    finished = sum(zfile.getinfo(name).file_size for name in meta_files)
+    rows = 0
+
+    for filename in dict_files:
+        jsonDict = _read_term_bank(zfile, filename, deserialize)
+
+        # NOTE: Rows are not sorted by frequency here. Searches already order by the
+        # ``frequency`` column and sorting would need every term bank in memory at once.
+        #
+        if frequency_dict:
+            _computeYomiDictionaryByFrequency(
+                jsonDict,
+                frequency_dict,
+                readingHyouki=is_hyouki,
+            )
+
+        if meta_frequencies or meta_pitches:
+            _apply_term_meta(jsonDict, meta_frequencies, meta_pitches)
+
+        for entry in jsonDict:
+            yield entry.serialize()
+
+        finished += zfile.getinfo(filename).file_size
+        rows += len(jsonDict)
+
+        if progress:
+            progress(finished, total, rows)
+
+
+# NOTE: The functions below run once per imported entry. Most fields need no changes
+# at all, so each rewrite is guarded by a membership test. That is cheaper than
+# rewriting unconditionally and, in CPython, cheaper than one regex with a callback.
+#
+def _getAdjustedTerm(term: str) -> str:
+    if "\n" in term:
+        term = term.replace("\n", "")
+
+    if "=" in term and len(term) > 1:
+        term = term.replace("=", "")
+
+    return term
+
+
+def _getAdjustedPronunciation(pronunciation: str) -> str:
+    if "\n" in pronunciation:
+        return pronunciation.replace("\n", "")
+
+    return pronunciation
+
+
+def _replace_media_marker(match: re.Match[str]) -> str:
+    return _MEDIA_TAG.format(path=match.group(1).replace('"', "&quot;"))
+
+
+def _getAdjustedDefinition(definition: str) -> str:
+    """Escape ``definition`` for HTML, except for its line breaks and media."""
+    if "<" in definition or ">" in definition:
+        # NOTE: Line breaks become "\n" first so that they survive the escaping
+        definition = (
+            definition.replace("<br>", "\n").replace("<", "&lt;").replace(">", "&gt;")
+        )
+
+    if "\n" in definition:
+        definition = definition.replace("\n", "<br>")
+
+        if definition.endswith("<br>"):
+            definition = definition[: -len("<br>")]
+
+    if "\ue000" in definition:
+        definition = _MEDIA_MARKER_EXPRESSION.sub(_replace_media_marker, definition)
+
+    return definition
+
+
+def _kaner(to_translate: str, hiraganer: bool = False) -> str:
+    hiragana = (
+        "がぎぐげござじずぜぞだぢづでどばびぶべぼぱぴぷぺぽ"
+        "あいうえおかきくけこさしすせそたちつてと"
+        "なにぬねのはひふへほまみむめもやゆよらりるれろ"
+        "わをんぁぃぅぇぉゃゅょっゐゑ"
+    )
+    katakana = (
+        "ガギグゲゴザジズゼゾダヂヅデドバビブベボパピプペポ"
+        "アイウエオカキクケコサシスセソタチツテト"
+        "ナニヌネノハヒフヘホマミムメモヤユヨラリルレロ"
+        "ワヲンァィゥェォャュョッヰヱ"
+    )
+
+    if hiraganer:
+        katakana_as_int = [ord(char) for char in katakana]
+        translate_table = dict(zip(katakana_as_int, hiragana))
+    else:
+        hiragana_as_int = [ord(char) for char in katakana]
+        translate_table = dict(zip(hiragana_as_int, katakana))
+
+    return to_translate.translate(translate_table)
+
+
+def _adjustReading(reading: str) -> str:
+    return _kaner(reading)
+
+
+def _computeYomiDictionaryByFrequency(
+    jsonDict: typing.Sequence[_FlatDictionary],
+    frequencyDict: _FrequencyDict,
+    readingHyouki: bool,
+    # TODO: @ColinKennedy - The returned type is kind of "migaku-extended" to consider
+) -> None:
+    def _passthrough(value: str) -> str:
+        return value
+
+    modify_reading: typing.Callable[[str], str]
+
+    if readingHyouki:
+        modify_reading = _adjustReading
+    else:
+        modify_reading = _passthrough
+
+    for entry in jsonDict:
+        reading = modify_reading(entry.get_reading())
+        term = entry.get_term()
+
+        if (term, reading) in frequencyDict:
+            entry.set_frequency(frequencyDict[(term, reading)])
+        else:
+            entry.clear_frequency()
+
+
+def _getFrequencyDict(lang: str) -> tuple[_FrequencyDict, bool]:
+    filePath = os.path.join(dictdb.get().getDirectory(), "frequency", "%s.json" % lang)
+
+    if not os.path.exists(filePath):
+        raise RuntimeError(f'Path "{filePath}" does not exist.')
+
+    with open(filePath, "r", encoding="utf-8-sig") as handler:
+        data = typing.cast(
+            typing.Union[
+                dict[typing.Any, typing.Any], list[list[typing.Union[int, str]]]
+            ],
+            json.load(handler),
+        )
+
+    if isinstance(data, abc.MutableMapping):
+        raise RuntimeError(f'Frequency file "{filePath}" was not a list.')
+
+    if not isinstance(data, list):
+        raise RuntimeError(
+            f'Unable to read from frequency file "{filePath}" '
+            "because it is not a known layout."
+        )
+
+    frequencyDict: _FrequencyDict = {}
+
+    for item in data:
+        # Examples:
+        # ["の","freq",{"value":1,"displayValue":"1㋕"}]
+        # ["其","freq",{"reading":"それ","frequency":{"value":17,"displayValue":"17㋕"}}]
+
+        if (
+            len(item) != 3
+            or not isinstance(item[0], str)
+            or not isinstance(item[1], str)
+        ):
+            raise RuntimeError(
+                f'Unable to read "{item}" frequency item. Its structure is unknown.'
+            )
+
+        frequency_ = item[2]
+
+        if not isinstance(frequency_, abc.MutableMapping):
+            raise RuntimeError(
+                f'Unable to read "{item}" frequency item. Its data is not a dict.'
+            )
+
+        frequency: typing.Union[_FrequencyEntryValue, _FrequencyReadingEntryValue]
+        term = item[0]
+
+        if "reading" in frequency_:
+            reading = frequency_["reading"]
+            frequencyDict[(term, reading)] = frequency_["frequency"]["value"]
+        else:
+            frequencyDict[(term, term)] = frequency_["value"]
+
+    is_hyouki = True
+
+    if data and isinstance(data[0], str):
+        # NOTE: In the past migaku code it had a line roughly like this:
+        # `is_hyouki = frequencyDict['readingDictionaryType']`.
+        # Since we aren't sure what this is about, maybe just keep it.
+        #
+        is_hyouki = False
+
+    return frequencyDict, is_hyouki
+
+
+def _get_media_html(value: typing.Any) -> typing.Optional[str]:
+    """Get a media placeholder if ``value`` is a Yomitan image node."""
+    if not isinstance(value, abc.Mapping):
+        return None
+
+    if value.get("tag") != "img" and value.get("type") != "image":
+        return None
+
+    path = value.get("path")
+
+    if not isinstance(path, str):
+        return None
+
+    return _MEDIA_MARKER.format(path=path.replace("\ue001", ""))
+
+
+def _get_content_html(value: typing.Any) -> str:
+    """Flatten nested Yomitan structured content into its text and images."""
+    if isinstance(value, str):
+        return value
+
+    if isinstance(value, list):
+        return "".join(_get_content_html(item) for item in value)
+
+    media = _get_media_html(value)
+
+    if media is not None:
+        return media
+
+    if isinstance(value, abc.Mapping) and "content" in value:
+        return _get_content_html(value["content"])
+
+    return ""
+
+
+def _get_definitions(value: typing.Any) -> typing.Optional[list[str]]:
+    """Get the definitions of a term bank entry's glossary, if it has any."""
+    if all(isinstance(item, str) for item in value):
+        return typing.cast(list[str], value)
+
+    media = [item if isinstance(item, str) else _get_media_html(item) for item in value]
+
+    if all(media):
+        return typing.cast(list[str], media)
+
+    return _get_yomitan_definitions(value)
+
+
+def _get_yomitan_definitions(value: typing.Any) -> typing.Optional[list[str]]:
+    """Parse ``value`` as though it is a Yomitan-style dictionary.
+
+    Yomitan dictionaries seem to have a variety of different structures. Some values are
+    "type or list[type]" and other sort of situations. This function tries to handle all
+    of them.
+
+    Args:
+        value: Some nested-but-known dict structure.
+
+    Returns:
+        If ``value`` cannot be parsed, return None. Otherwise return all found
+        vocabulary definitions.
+
+    """
+    # Yomitan dictionaries sometimes have a nested dict structure, list[dict[...]],
+    # where otherwise a list[str] would have been. This can happen if the data contains
+    # multiple definitions or definitions + examples. We need to extract the definitions
+    # that we need from that.
+    #
+    # Note:
+    #     In the full example below, we're interested only in the nested list's data.
+    #
+    # Full Example:
+    # [
+    #     'πâ╜',
+    #     'πâ╜',
+    #     'unc',
+    #     '',
+    #     -200,
+    #     [
+    #         {
+    #             'content': [
+    #                 {
+    #                     'content': {
+    #                         'content': 'repetition mark in katakana',
+    #                         'tag': 'li',
+    #                     },
+    #                     'data': {'content': 'glossary'},
+    #                     'lang': 'en',
+    #                     'style': {'listStyleType': 'circle'},
+    #                     'tag': 'ul'
+    #                 },
+    #                 {
+    #                     'content': {
+    #                         'content': [
+    #                             'see: ',
+    #                             {
+    #                                 'content': 'Σ╕Çπü«σ¡ùτé╣',
+    #                                 'href': '?query=Σ╕Çπü«σ¡ùτé╣&wildcards=off',
+    #                                 'lang': 'ja',
+    #                                 'tag': 'a',
+    #                             },
+    #                             {
+    #                                 'content': ' kana iteration mark',
+    #                                 'data': {'content': 'refGlosses'},
+    #                                 'style': {'fontSize': '65%', 'verticalAlign': 'middle'},
+    #                                 'tag': 'span',
+    #                             },
+    #                         ],
+    #                         'tag': 'li',
+    #                     },
+    #                     'data': {'content': 'references'},
+    #                     'lang': 'en',
+    #                     'style': {'listStyleType': "'Γ₧í∩╕Å '"},
+    #                     'tag': 'ul',
+    #                 },
+    #             ],
+    #             'type': 'structured-content',
+    #         },
+    #     ],
+    #     1000000,
+    #     '',
+    # ]
+    #
+
+    if not isinstance(value, list):
+        _LOGGER.debug('Value "%s" is not a sequence.', value)
+
+        return None
+
+    # IMPORTANT: ``all_content`` may not actually be this type. But our run-time checks
+    # will handle it in case it isn't.
+    #
+    all_content = typing.cast(list[yomitan_type.DictionaryEntryWithExamples], value)
+
+    definitions: list[str] = []
+
+    for item in all_content:
+        if not isinstance(item, dict):
+            _LOGGER.debug('Item "%s" is not a dict.', item)
+
+            return None
+
+        if "content" not in item:
+            _LOGGER.debug('Item "%s" does not have an expected content key.', item)
+
+            return None
+
+        inner_content = item["content"]
+
+        if not isinstance(inner_content, list):
+            _LOGGER.debug('Item "%s" does not have an expected content key.', item)
+
+            return None
+
+        for entry in inner_content:
+            try:
+                content = entry["data"]["content"]
+            except KeyError:
+                _LOGGER.debug('Unrecognized "%s" content.', item)
+
+                continue
+
+            if content != "glossary":
+                # NOTE: There's different types of content. Skip the unrelated ones,
+                _LOGGER.debug('Skipping "%s" content from "%s" entry.', content, entry)
+
+                continue
+
+            found = entry["content"]
+
+            if not isinstance(found, list):
+                found = [found]
+
+            for definition in found:
+                definitions.append(_get_content_html(definition["content"]))
+
+    return definitions
+
+
+def importDict(
+    lang_name: str,
+    path: typing.Union[typing.BinaryIO, str],
+    dict_name: str,
+    progress: typing.Optional[ImportProgressCallback] = None,
+) -> tuple[int, int]:
+    """Import the Yomichan / Yomitan or Migaku zip or dictionary pack at ``path``.
+
+    Term banks, or the JSON files of a Migaku dictionary, are read, matched against the
+    dictionary's own term meta banks and the language's frequency list and inserted one
+    at a time so that memory stays bounded by the largest of them. Packs, made by
+    :func:`buildPack`, are detected automatically and copied in directly.
+
+    Args:
+        lang_name: The language to add the dictionary to.
+        path: The zip / pack file or an open binary stream of it.
+        dict_name: The user-facing name of the new dictionary.
+        progress: Called with ``(finished_bytes, total_bytes, rows)`` after each term
+            bank. The bytes are the uncompressed size of the term and meta banks.
+
+    Raises:
+        ValueError: If the dictionary could not be created.
+
+    Returns:
+        The number of imported rows and of dropped duplicate entries.
+
+    """
+    db = dictdb.get()
+    dict_name = dict_name.replace(" ", "_")
+
+    if _is_pack(path):
+        return _install_pack(lang_name, path, dict_name, progress)
+
+    with zipfile.ZipFile(path) as zfile:
+        dict_files, is_yomichan = _get_dictionary_files(zfile)
+        table = _add_dictionary(lang_name, dict_name)
+
+        try:
+            rows, duplicates = db.importToDict(
+                table,
+                _read_dictionary_rows(
+                    zfile, dict_files, lang_name, progress, is_yomichan
+                ),
+            )
+            db.indexExamples(table)
+            _install_media(zfile, dict_name)
+        except Exception:
+            db.rollbackChanges()
+            db.deleteDict(table)
+
+            raise
+
+    db.commitChanges()
+
+    return rows, duplicates
+
+
+def updateDict(
+    lang_name: str,
+    path: typing.Union[typing.BinaryIO, str],
+    dict_name: str,
+    progress: typing.Optional[ImportProgressCallback] = None,
+) -> tuple[int, int, int]:
+    """Update an installed dictionary to the release in the zip or pack at ``path``.
+
+    Instead of removing and importing the dictionary again, every entry of the new
+    release is hashed and compared against the hashes of the installed entries. Only
+    the entries that were added or removed are written.
+
+    Args:
+        lang_name: The language of the dictionary.
+        path: The zip / pack file or an open binary stream of it.
+        dict_name: The user-facing name of the installed dictionary.
+        progress: Called with ``(finished_bytes, total_bytes, rows)`` after each term
+            bank. The bytes are the uncompressed size of the term and meta banks.
+
+    Raises:
+        ValueError: If the dictionary is not installed, or not for ``lang_name``.
+
+    Returns:
+        The number of added and removed entries and of dropped duplicate entries.
+
+    """
+    db = dictdb.get()
+    dict_name = dict_name.replace(" ", "_")
+    table = db.getDictTable(dict_name)
+
+    if not table:
+        raise ValueError(f'Dictionary "{dict_name}" is not installed.')
+
+    if table != _recommend_table_name(lang_name, dict_name):
+        raise ValueError(
+            f'Dictionary "{dict_name}" is installed for another language than '
+            f'"{lang_name}". Remove it before installing it again.'
+        )
+
+    if _is_pack(path):
+        with _get_pack_path(path) as pack_path:
+            metadata = _read_pack_metadata(pack_path)
+            inserted, deleted, duplicates = db.updateDict(
+                table, _read_pack_rows(pack_path, lang_name)
+            )
+
+            # NOTE: Duplicates were already dropped when the pack was built
+            return inserted, deleted, duplicates + int(metadata.get("duplicates", 0))
+
+    with zipfile.ZipFile(path) as zfile:
+        dict_files, is_yomichan = _get_dictionary_files(zfile)
+        changes = db.updateDict(
+            table,
+            _read_dictionary_rows(zfile, dict_files, lang_name, progress, is_yomichan),
+        )
+        _install_media(zfile, dict_name)
+
+    return changes
+
+
+def installMedia(path: typing.Union[typing.BinaryIO, str], dict_name: str) -> None:
+    """Install the media of the dictionary zip at ``path`` for ``dict_name``.
+
+    Packs carry no media, so a dictionary installed from a pack of ``path`` gets its
+    images from the zip with this.
+
+    """
+    with zipfile.ZipFile(path) as zfile:
+        _install_media(zfile, dict_name.replace(" ", "_"))
+
+
+def getFrequencyRows(lang: str) -> list[tuple[str, str, int]]:
+    """Get every ``(term, reading, frequency)`` of the frequency list of ``lang``.
+
+    Raises:
+        RuntimeError: If ``lang`` has no readable frequency list.
+
+    """
+    frequency_dict, _ = _getFrequencyDict(lang)
+
+    return [
+        (term, reading, frequency)
+        for (term, reading), frequency in frequency_dict.items()
+    ]
+
+
+def profileDict(path: typing.Union[typing.BinaryIO, str]) -> ImportProfile:
+    """Time each stage of importing the dictionary zip at ``path``, without a database.
+
+    The term banks are decompressed, parsed, deserialized into entries and normalized
+    into rows, one stage at a time, so that their costs can be compared.
+
+    """
+    read = parse = deserialize = normalize = 0.0
+    entries = 0
+
+    with zipfile.ZipFile(path) as zfile:
+        dict_files, is_yomichan = _get_dictionary_files(zfile)
+        converter = (
+            _FlatDictionary.deserialize if is_yomichan else _FlatDictionary.from_migaku
+        )
+
+        for filename in dict_files:
+            start = time.perf_counter()
+            text = zfile.read(filename)
+            read += time.perf_counter() - start
+
+            start = time.perf_counter()
+            data = json.loads(text)
+            parse += time.perf_counter() - start
+
+            start = time.perf_counter()
+            converted = [converter(entry) for entry in data]
+            deserialize += time.perf_counter() - start
+
+            start = time.perf_counter()
+
+            for entry in converted:
+                if entry:
+                    entry.serialize()
+
+            normalize += time.perf_counter() - start
+            entries += len(data)
+
+    return ImportProfile(entries, read, parse, deserialize, normalize)
+
+
+def buildPack(
+    path: typing.Union[typing.BinaryIO, str],
+    pack_path: str,
+    progress: typing.Optional[ImportProgressCallback] = None,
+) -> int:
+    """Convert the Yomichan / Yomitan or Migaku dictionary zip at ``path`` into a pack.
+
+    A pack is a SQLite file holding the finished dictionary table, with all of its
+    indexes, plus a ``metadata`` table. :func:`importDict` installs it without parsing
+    anything. Only the dictionary's own frequencies are packed. The language's
+    frequency list is left out because every user has their own, which is applied when
+    the pack is installed.
+
+    Args:
+        path: The zip file or an open binary stream of it.
+        pack_path: The pack file to write. It must not exist yet.
+        progress: Called with ``(finished_bytes, total_bytes, rows)`` after each term
+            bank. The bytes are the uncompressed size of the term and meta banks.
+
+    Raises:
+        ValueError: If ``pack_path`` exists.
+
+    Returns:
+        The number of packed rows.
+
+    """
+    if os.path.exists(pack_path):
+        raise ValueError(f'Pack "{pack_path}" already exists.')
+
+    with zipfile.ZipFile(path) as zfile:
+        dict_files, is_yomichan = _get_dictionary_files(zfile)
+        index: dict[str, typing.Any] = {}
+
+        if "index.json" in zfile.namelist():
+            with zfile.open("index.json") as handler:
+                index = json.load(handler)
+
+        connection = sqlite3.connect(pack_path)
+
+        try:
+            cursor = connection.cursor()
+            cursor.execute("PRAGMA journal_mode = OFF;")
+            cursor.execute("PRAGMA synchronous = OFF;")
+            cursor.execute(
+                "CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            )
+            dictdb.createDictionaryTable(cursor, "entries")
+            rows, duplicates = dictdb.insertDictionaryRows(
+                cursor,
+                "entries",
+                _read_dictionary_rows(zfile, dict_files, None, progress, is_yomichan),
+                str(index.get("title") or os.path.basename(pack_path)),
+            )
+            cursor.executemany(
+                "INSERT INTO metadata (key, value) VALUES (?, ?);",
+                [
+                    ("format", str(_PACK_FORMAT)),
+                    ("title", str(index.get("title", ""))),
+                    ("revision", str(index.get("revision", ""))),
+                    ("rows", str(rows)),
+                    ("duplicates", str(duplicates)),
+                ],
+            )
+            connection.commit()
+            cursor.execute("VACUUM;")
+        except BaseException:
+            connection.close()
+            os.remove(pack_path)
+
+            raise
+
+        connection.close()
+
+    return rows
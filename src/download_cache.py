@@ -0,0 +1,313 @@
+"""A local cache for files that the add-on downloads from a server.
+
+Every URL is stored once under ``user_files/cache/downloads``. A cached file is
+revalidated with ``ETag`` / ``Last-Modified`` instead of being downloaded again and an
+interrupted download is resumed with an HTTP ``Range`` request. Each file is hashed
+while it streams so that a damaged cache entry is noticed and replaced.
+
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import typing
+
+import requests
+from anki import httpclient
+
+addon_path = os.path.dirname(__file__)
+
+_CACHE_DIRECTORY = os.path.join(addon_path, "user_files", "cache", "downloads")
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-\d+/(\d+|\*)")
+_LOGGER = logging.getLogger(__name__)
+_LOCKS: dict[str, threading.Lock] = {}
+_LOCKS_LOCK = threading.Lock()
+
+ProgressCallback = typing.Callable[[int, int], None]
+
+
+class DownloadCancelled(Exception):
+    """Raised once the caller asked to stop a download."""
+
+
+class DownloadError(RuntimeError):
+    """Raised when a file could not be downloaded and no cached copy exists."""
+
+
+class _Metadata(typing.TypedDict, total=False):
+    url: str
+    etag: str
+    last_modified: str
+    size: int
+    sha256: str
+    mtime: float
+
+
+def _get_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _get_lock(key: str) -> threading.Lock:
+    with _LOCKS_LOCK:
+        return _LOCKS.setdefault(key, threading.Lock())
+
+
+def _read_metadata(path: str) -> _Metadata:
+    try:
+        with open(path, "r", encoding="utf-8") as handler:
+            return typing.cast(_Metadata, json.load(handler))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_metadata(path: str, metadata: _Metadata) -> None:
+    temporary = path + ".tmp"
+
+    with open(temporary, "w", encoding="utf-8") as handler:
+        json.dump(metadata, handler)
+
+    os.replace(temporary, path)
+
+
+def _remove(*paths: str) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+
+    with open(path, "rb") as handler:
+        for chunk in iter(lambda: handler.read(httpclient.HTTP_BUF_SIZE), b""):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def _is_intact(path: str, metadata: _Metadata) -> bool:
+    """Check that the cached file at ``path`` is still what was downloaded.
+
+    The file is only re-hashed if its size or modification time changed.
+
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+
+    if stat.st_size != metadata.get("size"):
+        return False
+
+    if stat.st_mtime == metadata.get("mtime"):
+        return True
+
+    return _hash_file(path) == metadata.get("sha256")
+
+
+def _get_validators(metadata: _Metadata) -> dict[str, str]:
+    headers: dict[str, str] = {}
+
+    if "etag" in metadata:
+        headers["If-None-Match"] = metadata["etag"]
+
+    if "last_modified" in metadata:
+        headers["If-Modified-Since"] = metadata["last_modified"]
+
+    return headers
+
+
+def _get_resume_offset(response: requests.Response, part_size: int) -> int:
+    """Find where the body of ``response`` starts within the downloaded file."""
+    if response.status_code != 206:
+        return 0
+
+    match = _CONTENT_RANGE.fullmatch(response.headers.get("Content-Range", ""))
+
+    if not match or int(match.group(1)) != part_size:
+        raise DownloadError(f'Server sent an unexpected range for "{response.url}".')
+
+    return part_size
+
+
+def fetch(
+    url: str,
+    progress: typing.Optional[ProgressCallback] = None,
+    is_cancelled: typing.Optional[typing.Callable[[], bool]] = None,
+) -> str:
+    """Download ``url`` into the cache, unless an up-to-date copy is there already.
+
+    Args:
+        url: The file to download.
+        progress: Called with ``(finished_bytes, total_bytes)`` while downloading.
+            ``total_bytes`` is 0 if the server did not say how large the file is.
+        is_cancelled: Polled between chunks. Return True to stop the download. The
+            partial file is kept so that the next call resumes it.
+
+    Raises:
+        DownloadCancelled: If ``is_cancelled`` returned True.
+        DownloadError: If the server failed and nothing usable is cached.
+
+    Returns:
+        The path of the complete, cached file. Callers must not modify it.
+
+    """
+    os.makedirs(_CACHE_DIRECTORY, exist_ok=True)
+
+    key = _get_key(url)
+    path = os.path.join(_CACHE_DIRECTORY, key)
+
+    with _get_lock(key):
+        return _fetch(url, path, progress, is_cancelled)
+
+
+def _fetch(
+    url: str,
+    path: str,
+    progress: typing.Optional[ProgressCallback],
+    is_cancelled: typing.Optional[typing.Callable[[], bool]],
+) -> str:
+    metadata_path = path + ".json"
+    part_path = path + ".part"
+    part_metadata_path = part_path + ".json"
+
+    metadata = _read_metadata(metadata_path)
+    is_cached = bool(metadata) and _is_intact(path, metadata)
+    headers = _get_validators(metadata) if is_cached else {}
+    # NOTE: Ranges, lengths and hashes must all refer to the stored bytes
+    headers["Accept-Encoding"] = "identity"
+
+    part_metadata = _read_metadata(part_metadata_path)
+    part_size = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+    validator = part_metadata.get("etag") or part_metadata.get("last_modified")
+
+    if part_size and validator:
+        headers["Range"] = "bytes=%d-" % part_size
+        headers["If-Range"] = validator
+
+    try:
+        with httpclient.HttpClient() as client:
+            response = client.get(url, headers=headers)
+
+            if "Range" in headers and response.status_code not in (200, 206, 304):
+                # NOTE: A stale part, e.g. one that finished but was never renamed or
+                # one of an older file, fails every resume. Start over without it.
+                #
+                _LOGGER.info(
+                    'Discarding the partial download of "%s": the server answered %d.',
+                    url,
+                    response.status_code,
+                )
+                response.close()
+                _remove(part_path, part_metadata_path)
+                part_size = 0
+                del headers["Range"], headers["If-Range"]
+                response = client.get(url, headers=headers)
+
+            if response.status_code == 304 and is_cached:
+                _LOGGER.info('Using the cached copy of "%s".', url)
+                _remove(part_path, part_metadata_path)
+
+                return path
+
+            if response.status_code not in (200, 206):
+                if is_cached:
+                    _LOGGER.warning(
+                        'Using the cached copy of "%s": the server answered %d.',
+                        url,
+                        response.status_code,
+                    )
+
+                    return path
+
+                raise DownloadError("Download failed (%d)." % response.status_code)
+
+            try:
+                offset = _get_resume_offset(response, part_size)
+            except DownloadError:
+                _remove(part_path, part_metadata_path)
+
+                raise
+
+            metadata = {"url": url}
+
+            if "ETag" in response.headers:
+                metadata["etag"] = response.headers["ETag"]
+
+            if "Last-Modified" in response.headers:
+                metadata["last_modified"] = response.headers["Last-Modified"]
+
+            _write_metadata(part_metadata_path, metadata)
+            _stream(response, part_path, offset, progress, is_cancelled, metadata)
+    except requests.RequestException as error:
+        if is_cached:
+            _LOGGER.warning('Using the cached copy of "%s": %s', url, error)
+
+            return path
+
+        raise DownloadError(f'Download of "{url}" failed: {error}') from error
+
+    os.replace(part_path, path)
+    metadata["mtime"] = os.stat(path).st_mtime
+    _write_metadata(metadata_path, metadata)
+    _remove(part_metadata_path)
+
+    return path
+
+
+def _stream(
+    response: requests.Response,
+    part_path: str,
+    offset: int,
+    progress: typing.Optional[ProgressCallback],
+    is_cancelled: typing.Optional[typing.Callable[[], bool]],
+    metadata: _Metadata,
+) -> None:
+    """Write the body of ``response`` to ``part_path``, starting at ``offset``.
+
+    ``metadata`` receives the size and hash of the complete file.
+
+    Raises:
+        DownloadError: If the server sent less than it announced.
+
+    """
+    hasher = hashlib.sha256()
+    finished = 0
+
+    if offset:
+        with open(part_path, "rb") as handler:
+            for chunk in iter(lambda: handler.read(httpclient.HTTP_BUF_SIZE), b""):
+                hasher.update(chunk)
+                finished += len(chunk)
+
+        _LOGGER.info('Resuming "%s" at %d bytes.', response.url, finished)
+
+    length = int(response.headers.get("Content-Length") or 0)
+    total = finished + length if length else 0
+
+    with open(part_path, "ab" if offset else "wb") as handler:
+        for chunk in response.iter_content(chunk_size=httpclient.HTTP_BUF_SIZE):
+            if is_cancelled and is_cancelled():
+                raise DownloadCancelled()
+
+            handler.write(chunk)
+            hasher.update(chunk)
+            finished += len(chunk)
+
+            if progress:
+                progress(finished, total)
+
+    if total and finished != total:
+        raise DownloadError(
+            f'Download of "{response.url}" stopped at {finished} of {total} bytes.'
+        )
+
+    metadata["size"] = finished
+    metadata["sha256"] = hasher.hexdigest()
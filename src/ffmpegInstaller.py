@@ -5,13 +5,12 @@ import typing
 import zipfile
 
 import aqt
-import requests
 from anki import hooks, utils
 from aqt import gui_hooks, main
 from aqt import mw as mw_
 from aqt import qt
 
-from . import miutils, typer
+from . import download_cache, miutils, typer
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,7 +33,8 @@ class FFMPEGInstaller:
         elif utils.is_mac:
             self._downloadURL = "http://dicts.migaku.io/ffmpeg/macos"
         self._ffmpegPath = os.path.join(self._ffmpegDir, self._ffmpegFilename)
-        self._tempPath = os.path.join(self._addonPath, "temp", "ffmpeg")
+        # NOTE: Set once the archive is in the download cache
+        self._tempPath = ""
 
     def _get_configuration(self) -> typer.Configuration:
         return typing.cast(
@@ -82,35 +82,39 @@ class FFMPEGInstaller:
     def _downloadFFMPEG(self) -> bool:
         progressWidget: typing.Optional[qt.QWidget] = None
         try:
-            with requests.get(self._downloadURL, stream=True) as ffmpegRequest:
-                ffmpegRequest.raise_for_status()
-                with open(self._tempPath, "wb") as ffmpegFile:
-                    downloadingText = "Downloading FFMPEG...\n{}kb of {}kb downloaded."
-                    total = int(ffmpegRequest.headers["Content-Length"])
-                    roundedTotal = _roundToKb(total)
-                    downloadedSoFar = 0
-                    progressWidget, bar, textDisplay = self._getFFMPEGProgressBar(
-                        "Migaku Dictionary - FFMPEG Download",
-                        downloadingText.format(
-                            _roundToKb(downloadedSoFar), roundedTotal
-                        ),
-                    )
-                    bar.setMaximum(total)
-                    lastUpdated: typing.Union[float, int] = 0
-                    for chunk in ffmpegRequest.iter_content(chunk_size=8192):
-                        if chunk:
-                            downloadedSoFar += len(chunk)
-                            roundedValue = _roundToKb(downloadedSoFar)
-                            if roundedValue - lastUpdated > 500:
-                                lastUpdated = roundedValue
-                                bar.setValue(downloadedSoFar)
-                                textDisplay.setText(
-                                    downloadingText.format(roundedValue, roundedTotal)
-                                )
-                                self._mw.app.processEvents()
-                            ffmpegFile.write(chunk)
-
-                self._closeProgressBar(progressWidget)
+            downloadingText = "Downloading FFMPEG...\n{}kb of {}kb downloaded."
+            unknownSizeText = "Downloading FFMPEG...\n{}kb downloaded."
+            progressWidget, bar, textDisplay = self._getFFMPEGProgressBar(
+                "Migaku Dictionary - FFMPEG Download",
+                downloadingText.format(0, 0),
+            )
+            lastUpdated: typing.Union[float, int] = 0
+
+            def updateProgress(downloadedSoFar: int, total: int) -> None:
+                nonlocal lastUpdated
+                roundedValue = _roundToKb(downloadedSoFar)
+                if roundedValue - lastUpdated > 500:
+                    lastUpdated = roundedValue
+
+                    if total > 0:
+                        bar.setMaximum(total)
+                        bar.setValue(downloadedSoFar)
+                        textDisplay.setText(
+                            downloadingText.format(roundedValue, _roundToKb(total))
+                        )
+                    else:
+                        # NOTE: The server sent no size. A maximum of 0 makes the
+                        # bar show that it is busy instead of a percentage.
+                        #
+                        bar.setMaximum(0)
+                        textDisplay.setText(unknownSizeText.format(roundedValue))
+
+                    self._mw.app.processEvents()
+
+            self._tempPath = download_cache.fetch(
+                self._downloadURL, progress=updateProgress
+            )
+            self._closeProgressBar(progressWidget)
             return True
         except Exception as error:
             _LOGGER.exception("Unabled to download FFMPEG.")
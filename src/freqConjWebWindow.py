@@ -1,11 +1,11 @@
 import enum
 import os
+import shutil
 import typing
 
-from anki import httpclient
 from aqt import qt
 
-from . import typer, webConfig
+from . import download_cache, typer, webConfig
 
 addon_path = os.path.dirname(__file__)
 
@@ -92,10 +92,9 @@ class FreqConjWebWindow(qt.QDialog):
 
         url = idx.data(qt.Qt.ItemDataRole.UserRole)
 
-        client = httpclient.HttpClient()
-        resp = client.get(url)
-
-        if resp.status_code != 200:
+        try:
+            path = download_cache.fetch(url)
+        except download_cache.DownloadError:
             qt.QMessageBox.information(
                 self,
                 self.windowTitle(),
@@ -104,24 +103,20 @@ class FreqConjWebWindow(qt.QDialog):
 
             return
 
-        data = client.stream_content(resp)
-
         dir_path = os.path.join(addon_path, "user_files", "db", self._mode_str)
         os.makedirs(dir_path, exist_ok=True)
 
         dst_path = os.path.join(dir_path, "%s.json" % self._dst_lang)
 
-        with open(dst_path, "wb") as f:
-            f.write(data)
+        shutil.copyfile(path, dst_path)
 
         if self._mode == self.Mode.Freq:
-            msg = (
-                'Imported frequency data for "%s".\n\nNote that the frequency data is only applied to newly imported dictionaries for this language.'
-                % self._dst_lang
-            )
+            from . import dictionaryManager
+
+            dictionaryManager.askRecomputeFrequencies(self._dst_lang, parent=self)
         else:
             msg = 'Imported conjugation data for "%s".' % self._dst_lang
-        qt.QMessageBox.information(self, self.windowTitle(), msg)
+            qt.QMessageBox.information(self, self.windowTitle(), msg)
 
         self.accept()
 
@@ -0,0 +1,105 @@
+"""Highlight the searched term and the example sentences of search results.
+
+A search highlights the same target in the term, alternate term, pronunciation and
+definition of every entry that it finds. :class:`Highlighter` compiles that target,
+and its deinflected forms, once per search instead of once per piece of text.
+
+"""
+
+from __future__ import annotations
+
+import re
+import typing
+
+_TARGET = '<span class="targetTerm">%s</span>'
+_EXAMPLE_START = '<span class="exampleSentence">'
+_EXAMPLE_END = "</span>"
+# NOTE: Matched before any target, so that tags and their attributes, e.g.
+# ``data-media="img/cat.png"``, are skipped as a whole
+#
+_TAG = "<[^>]*>"
+
+
+class Highlighter:
+    """Highlight the targets of one search within any number of texts."""
+
+    def __init__(
+        self,
+        targets: typing.Iterable[str],
+        highlight_targets: bool = True,
+        highlight_examples: bool = True,
+    ) -> None:
+        """Compile what to highlight.
+
+        Args:
+            targets: The searched term and e.g. its deinflected forms. Where several
+                targets match at the same place, the longest one is highlighted.
+            highlight_targets: If False, ``targets`` are left as-is.
+            highlight_examples: If False, example sentences are left as-is.
+
+        """
+        unique = sorted({target for target in targets if target}, key=len, reverse=True)
+        self._pattern: typing.Optional[re.Pattern[str]] = None
+        # NOTE: The markup of each target is made up-front. Substituting a template
+        # per match costs more than finding the match.
+        #
+        self._replacements = {target: _TARGET % target for target in unique}
+
+        if highlight_targets and unique:
+            self._pattern = re.compile(
+                "(" + "|".join([_TAG, *map(re.escape, unique)]) + ")"
+            )
+
+        self._highlight_examples = highlight_examples
+
+    def _highlight_targets(self, text: str) -> str:
+        if self._pattern is None:
+            return text
+
+        # NOTE: Every odd piece is a tag or a target. Tags are kept as-is.
+        pieces = self._pattern.split(text)
+
+        if len(pieces) == 1:
+            return text
+
+        replacements = self._replacements
+        pieces[1::2] = [replacements.get(piece, piece) for piece in pieces[1::2]]
+
+        return "".join(pieces)
+
+    def highlight(
+        self, text: str, example_spans: typing.Sequence[tuple[int, int]] = ()
+    ) -> str:
+        """Highlight the targets of ``text`` and wrap each of its example sentences.
+
+        Each character of ``text`` is scanned once. A target is never matched across
+        the edge of an example sentence, within the markup that wraps it or within
+        any HTML tag of ``text``, such as the ``data-media`` attribute of an image.
+
+        Args:
+            text: A term, pronunciation or definition of a search result.
+            example_spans: The ``(start, end)`` of each 「example sentence」 within
+                ``text``, as found when the dictionary was imported.
+
+        Returns:
+            The highlighted HTML.
+
+        """
+        if not self._highlight_examples or not example_spans:
+            return self._highlight_targets(text)
+
+        parts: list[str] = []
+        last = 0
+
+        for start, end in example_spans:
+            parts += (
+                self._highlight_targets(text[last:start]),
+                _EXAMPLE_START,
+                self._highlight_targets(text[start:end]),
+                _EXAMPLE_END,
+            )
+            last = end
+
+        parts.append(self._highlight_targets(text[last:]))
+
+        return "".join(parts)
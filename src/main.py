@@ -50,6 +50,8 @@ from . import (
 
 _IS_EXPORTING_DEFINITIONS = False
 _MENU = None
+# NOTE: How long to wait after the profile loads before preparing the dictionary, in ms
+_WARM_START_DELAY = 1000
 T = typing.TypeVar("T")
 
 
@@ -102,11 +104,31 @@ def _verify(item: typing.Optional[T]) -> T:
     raise RuntimeError("Expected item to exist but got none.")
 
 
+def _indexMissingExamples(database: dictdb.DictDB) -> None:
+    """Index, once, the example sentences of dictionaries from older releases."""
+    tables = database.getUnindexedExampleTables()
+
+    if not tables:
+        return
+
+    mw.progress.start(
+        label="Indexing example sentences...", max=len(tables), immediate=True
+    )
+
+    try:
+        for index, table in enumerate(tables):
+            mw.progress.update(value=index)
+            database.indexExamples(table)
+    finally:
+        mw.progress.finish()
+
+
 def window_loaded() -> None:
     migaku_configuration.initialize_by_namespace()
     _IS_EXPORTING_DEFINITIONS = False
     migaku_settings.clear()
     dictdb.initialize(dictdb.DictDB())
+    _indexMissingExamples(dictdb.get())
     progressBar = False
     addon_path = os.path.dirname(__file__)
     currentNote = False
@@ -602,6 +624,9 @@ def window_loaded() -> None:
 
         if configuration["dictOnStart"]:
             midict.dictionaryInit()
+        elif configuration["dictWarmStart"]:
+            # NOTE: Wait for Anki to finish drawing its own windows first
+            mw.progress.timer(_WARM_START_DELAY, midict.prepareDictionary, False)
 
     def setupMenu(browser: browser_.Browser) -> None:
         a = qt.QAction("Export Definitions", browser)
@@ -38,12 +38,14 @@ from . import dictdb as dictdb_
 from . import (
     forvodl,
     googleimages,
+    highlighter,
     history,
     migaku_configuration,
     migaku_search,
     migaku_settings,
     miJapaneseHandler,
     miutils,
+    search_results,
     typer,
     welcomer,
 )
@@ -61,14 +63,95 @@ _CGEventRef = (
     typing.Any
 )  # TODO: @ColinKennedy - not sure how to refer to this in ``Quartz``.
 _StringSequence = typing.TypeVar("_StringSequence", bound=list[str])
+# NOTE: Term headers are split once into their literal pieces, with the name of a
+# "◳" placeholder between every two pieces. The webview fills them in per entry.
+#
+_TERM_HEADER_PLACEHOLDER = re.compile("◳([abfptxy])")
+# NOTE: A search only sends the headers of its entries. A tab asks for the
+# definitions that it shows once they scroll into view.
+#
+_MAX_STORED_RESULTS = 100
+# NOTE: Searching again for a term, e.g. from the history or while it is open in
+# another tab, reuses the entries of that search instead of finding them again.
+#
+_MAX_CACHED_RESULTS = 32
+# NOTE: Settings that the page changes are written once they stop changing for this
+# many milliseconds, so that e.g. clicking through checkboxes writes once.
+#
+_SETTINGS_WRITE_DELAY = 500
 T = typing.TypeVar("T")
 
 
+def _compileTermHeader(header: str) -> list[str]:
+    """Split a term header with "◳" placeholders into ``renderTermHeader`` pieces."""
+    return _TERM_HEADER_PLACEHOLDER.split(header)
+
+
+_DEFAULT_TERM_HEADER = _compileTermHeader(
+    '◳f<span class="listTerm">◳t</span>◳b◳x<span class="listAltTerm">◳a</span>◳y<span class="listPronunciation">◳p</span>'
+)
+_DEFAULT_SIDE_BAR_TERM_HEADER = _compileTermHeader(
+    '◳f<span class="term mainword">◳t</span>◳b◳x<span class="altterm  mainword">◳a</span>◳y<span class="pronunciation">◳p</span>'
+)
+
+
 class _AddTypeGroup(typing.TypedDict):
     name: str
     type: typer.AddType
 
 
+class _DictionaryPayload(typing.TypedDict):
+    name: str
+    # NOTE: The compiled term headers of the entries and of the side bar
+    headers: tuple[list[str], list[str]]
+    duplicateHeader: bool
+    addType: typer.AddType
+    fields: list[str]
+    # NOTE: Each entry is ``[term, altterm, pronunciation, starCount]``
+    entries: list[list[str]]
+
+
+class _Search(typing.TypedDict):
+    term: str
+    group: typer.DictionaryGroup2
+    searchType: typer.SearchTerm
+    deinflect: bool
+
+
+class _ResultPayload(typing.TypedDict):
+    id: int
+    # NOTE: What to search for again if the tab is evicted, see ``restoreTab:``
+    search: _Search
+    # NOTE: The length of the ``dictionaries`` JSON, to estimate the tab's memory
+    size: int
+    term: str
+    singleTab: bool
+    font: str
+    brackets: tuple[str, str]
+    tooltips: bool
+    fieldNames: list[str]
+    # NOTE: The pre-rendered Google Images / Forvo blocks, shown before dictionaries
+    extras: list[str]
+    # NOTE: ``dictionaries``, a list of ``_DictionaryPayload``, is serialized on
+    # its own so that repeat searches can reuse it. See ``_CachedResults``.
+
+
+class _CachedResults(typing.NamedTuple):
+    # NOTE: The JSON of every ``_DictionaryPayload`` of the search
+    dictionaries: str
+    # NOTE: The special dictionaries of the searched group, e.g. "Google Images"
+    knownDictionaries: set[str]
+    stored: search_results.StoredResults
+
+
+def _serializeResultPayload(payload: _ResultPayload, dictionaries: str) -> str:
+    """Get the JSON of ``payload``, with the already serialized ``dictionaries``."""
+    return '%s, "dictionaries": %s}' % (
+        json.dumps(payload, ensure_ascii=False)[:-1],
+        dictionaries,
+    )
+
+
 class MIDict(webview.AnkiWebView):
 
     def __init__(
@@ -94,19 +177,42 @@ class MIDict(webview.AnkiWebView):
         self._jSend = self.config["jReadingEdit"]
         self._maxW = self.config["maxWidth"]
         self._maxH = self.config["maxHeight"]
-        self._termHeaders = self._formatTermHeaders(
-            {
-                key: list(value)
-                for key, value in (self.db.getTermHeaders() or {}).items()
-            }
-        )
-        self._dupHeaders = self.db.getDupHeaders()
+        self._termHeaders, self._dupHeaders = self._loadHeaders()
         self._sType: typing.Optional[qt.QComboBox] = None
         self._radioCount = 0
+        self._resultCount = 0
+        self._results: dict[int, search_results.StoredResults] = {}
+        self._resultCache: dict[tuple[typing.Hashable, ...], _CachedResults] = {}
         self._homeDir = path
         self._conjugations = self._loadConjugations()
         self._threadpool = qt.QThreadPool()
         self._customFontsLoaded: list[str] = []
+        self._loaded = False
+
+        self._pendingSettings: dict[tuple[str, str], typing.Callable[[], None]] = {}
+        self._coalescedSettings = 0
+        self._settingsTimer = qt.QTimer(self)
+        self._settingsTimer.setSingleShot(True)
+        self._settingsTimer.setInterval(_SETTINGS_WRITE_DELAY)
+        self._settingsTimer.timeout.connect(self.flushSettings)
+        self._messageHandlers: dict[str, typing.Callable[[typing.Any], None]] = {
+            "loaded": self._onLoaded,
+            "getBodies": self._onGetBodies,
+            "releaseResults": self._onReleaseResults,
+            "restoreTab": self._onRestoreTab,
+            "updateTerm": self._onUpdateTerm,
+            "saveFontSizes": self._onSaveFontSizes,
+            "setDuplicateHeader": self._onSetDuplicateHeader,
+            "fieldsSetting": self._onFieldsSetting,
+            "addTypeSetting": self._onAddTypeSetting,
+            "clip": self._onClip,
+            "sendToField": self._onSendToField,
+            "sendAudioToField": self._sendAudioToField,
+            "sendImageToField": self._sendImgToField,
+            "addDefinition": self._onAddDefinition,
+            "audioExport": self._onAudioExport,
+            "imageExport": self._onImageExport,
+        }
 
         self.deinflect = True
         self.onBridgeCmd = self._handleDictAction  # NOTE: This name comes from aqt
@@ -123,11 +229,21 @@ class MIDict(webview.AnkiWebView):
     def _on_editor_loaded(self, editor: editor_.Editor) -> None:
         self.currentEditor = editor
 
-    def _resetConfiguration(self, config: typer.Configuration) -> None:
-        self.config = config
-        self._jSend = self.config["jReadingEdit"]
-        self._maxW = self.config["maxWidth"]
-        self._maxH = self.config["maxHeight"]
+    def _loadHeaders(
+        self,
+    ) -> tuple[
+        typing.Optional[dict[str, tuple[list[str], list[str]]]],
+        typing.Optional[dict[str, int]],
+    ]:
+        """Get the term headers and duplicate headers of every dictionary."""
+        termHeaders = self._formatTermHeaders(
+            {
+                key: list(value)
+                for key, value in (self.db.getTermHeaders() or {}).items()
+            }
+        )
+
+        return termHeaders, self.db.getDupHeaders()
 
     def _showGoogleForvoMessage(self, message: str) -> None:
         miutils.miInfo(message, level="err")
@@ -140,8 +256,8 @@ class MIDict(webview.AnkiWebView):
 
     def _formatTermHeaders(
         self, ths: dict[str, typing.Iterable[str]]
-    ) -> typing.Optional[dict[str, tuple[str, str]]]:
-        formattedHeaders: dict[str, tuple[str, str]] = {}
+    ) -> typing.Optional[dict[str, tuple[list[str], list[str]]]]:
+        formattedHeaders: dict[str, tuple[list[str], list[str]]] = {}
 
         if not ths:
             return None
@@ -159,7 +275,10 @@ class MIDict(webview.AnkiWebView):
                 elif header == "pronunciation":
                     headerString += '<span class="pronunciation">◳p</span>'
                     sbHeaderString += '<span class="listPronunciation">◳p</span>'
-            formattedHeaders[dictname] = (headerString, sbHeaderString)
+            formattedHeaders[dictname] = (
+                _compileTermHeader(headerString),
+                _compileTermHeader(sbHeaderString),
+            )
         return formattedHeaders
 
     def _loadConjugations(self) -> dict[str, list[typer.Conjugation]]:
@@ -192,288 +311,217 @@ class MIDict(webview.AnkiWebView):
             .replace("」", "")
         )
 
-    def _getFontFamily(
+    def _getFontName(
         self, group: typing.Union[typer.DictionaryGroup, typer.DictionaryGroup2]
     ) -> str:
         if not group["font"]:
-            return " "
+            return ""
         if group["customFont"]:
-            return ' style="font-family:' + re.sub(r"\..*$", "", group["font"]) + ';" '
-        else:
-            return ' style="font-family:' + group["font"] + ';" '
+            return re.sub(r"\..*$", "", group["font"])
+        return group["font"]
+
+    def _getFontFamily(
+        self, group: typing.Union[typer.DictionaryGroup, typer.DictionaryGroup2]
+    ) -> str:
+        name = self._getFontName(group)
+        if not name:
+            return " "
+        return ' style="font-family:' + name + ';" '
 
     def _injectFont(self, font: str) -> None:
         name = re.sub(r"\..*$", "", font)
         self.eval("addCustomFont('%s', '%s');" % (font, name))
 
-    def _getTabMode(self) -> str:
-        if self._dictInt.tabB.singleTab:
-            return "true"
-        return "false"
+    def _getResultKey(self, search: _Search) -> tuple[typing.Hashable, ...]:
+        """Get what a repeat of ``search`` must match to reuse the last one.
 
-    def _getHTMLResult(
-        self,
-        term: str,
-        selectedGroup: typer.DictionaryGroup2,
-    ) -> tuple[str, str, str]:
-        singleTab = self._getTabMode()
-        cleaned = self._cleanTerm(term)
-        font = self._getFontFamily(selectedGroup)
-        dictDefs = self.config["dictSearch"]
-        maxDefs = self.config["maxSearch"]
-        html = self._prepareResults(
-            self.db.searchTerm(
-                term,
-                selectedGroup,
-                self._conjugations,
-                typing.cast(typer.SearchTerm, _verify(self._sType).currentText()),
-                self.deinflect,
-                str(dictDefs),
-                maxDefs,
+        Any write to the database, e.g. an imported dictionary or a changed
+        duplicate header, makes every older key stale.
+
+        """
+        return (
+            json.dumps(search, sort_keys=True),
+            self.config["frontBracket"],
+            self.config["backBracket"],
+            self.config["highlightTarget"],
+            self.config["highlightSentences"],
+            self.config["dictSearch"],
+            self.config["maxSearch"],
+            self.db.getChangeMarker(),
+        )
+
+    def _searchResults(self, search: _Search, cleaned: str) -> _CachedResults:
+        """Find the entries of ``search`` and serialize them for ``addResultTab``."""
+        highlight = self._getHighlighter(cleaned, search["group"], search["deinflect"])
+        results, known_dictionaries = self.db.searchTerm(
+            search["term"],
+            search["group"],
+            self._conjugations,
+            search["searchType"],
+            search["deinflect"],
+            str(self.config["dictSearch"]),
+            self.config["maxSearch"],
+        )
+        duplicates = self._dupHeaders or {}
+        termHeaders = self._termHeaders or {}
+        dictionaries: list[_DictionaryPayload] = []
+
+        for dictName, dictResults in results.items():
+            dictionaries.append(
+                {
+                    "name": dictName,
+                    "headers": termHeaders.get(
+                        dictName, (_DEFAULT_TERM_HEADER, _DEFAULT_SIDE_BAR_TERM_HEADER)
+                    ),
+                    "duplicateHeader": duplicates.get(dictName) == 1,
+                    "addType": self._getAddType(dictName),
+                    "fields": self.db.getFieldsSetting(dictName) or [],
+                    "entries": [
+                        search_results.get_result_entry(highlight, entry)
+                        for entry in dictResults
+                    ],
+                }
+            )
+
+        return _CachedResults(
+            json.dumps(dictionaries, ensure_ascii=False),
+            known_dictionaries,
+            search_results.StoredResults(
+                highlight,
+                [
+                    (dictName, entry)
+                    for dictName, dictResults in results.items()
+                    for entry in dictResults
+                ],
             ),
-            cleaned,
-            font,
         )
-        html = html.replace("\n", "")
-        return html, cleaned, singleTab
 
-    def _addResultWrappers(self, results: _StringSequence) -> _StringSequence:
-        for idx, result in enumerate(results):
-            if "dictionaryTitleBlock" not in result:
-                results[idx] = '<div class="definitionBlock">' + result + "</div>"
-        return results
+    def _getCachedResults(self, search: _Search, cleaned: str) -> _CachedResults:
+        """Find the entries of ``search``, or reuse them from an identical search."""
+        key = self._getResultKey(search)
+        # NOTE: Popping and re-adding moves ``key`` to the end, so the cache drops
+        # whichever search was used the longest time ago.
+        #
+        cached = self._resultCache.pop(key, None)
 
-    def _escapePunctuation(self, term: str) -> str:
-        return re.sub(r"([.*+(\[\]{}\\?)!])", "\\\1", term)
+        if cached is None:
+            cached = self._searchResults(search, cleaned)
 
-    def _highlightTarget(self, text: str, term: str) -> str:
-        if self.config["highlightTarget"]:
-            return re.sub(
-                "(" + self._escapePunctuation(term) + ")",
-                r'<span class="targetTerm">\1</span>',
-                text,
-            )
-        return text
+        self._resultCache[key] = cached
 
-    def _highlightExamples(self, text: str) -> str:
-        if self.config["highlightSentences"]:
-            return re.sub(
-                "(「[^」]+」)", r'<span class="exampleSentence">\1</span>', text
-            )
-        return text
+        if len(self._resultCache) > _MAX_CACHED_RESULTS:
+            del self._resultCache[next(iter(self._resultCache))]
 
-    def _getSideBar(
-        self,
-        results: dict[str, list[typer.DictionaryResult]],
-        term: str,
-        font: str,
-        frontBracket: str,
-        backBracket: str,
-    ) -> str:
-        html = "<div" + font + 'class="definitionSideBar"><div class="innerSideBar">'
-        dictCount = 0
-        entryCount = 0
-        for dictName, dictResults in results.items():
-            if dictName == "Google Images" or dictName == "Forvo":
-                html += (
-                    '<div data-index="'
-                    + str(dictCount)
-                    + '" class="listTitle">'
-                    + dictName
-                    + '</div><ol class="foundEntriesList"><li data-index="'
-                    + str(entryCount)
-                    + '">'
-                    + self._getPreparedTermHeader(
-                        dictName,
-                        frontBracket,
-                        backBracket,
-                        term,
-                        term,
-                        term,
-                        term,
-                        True,
-                    )
-                    + "</li></ol>"
-                )
-                entryCount += 1
-                dictCount += 1
-                continue
-            html += (
-                '<div data-index="'
-                + str(dictCount)
-                + '" class="listTitle">'
-                + dictName
-                + '</div><ol class="foundEntriesList">'
-            )
-            dictCount += 1
-            for idx, entry in enumerate(dictResults):
-                html += (
-                    '<li data-index="'
-                    + str(entryCount)
-                    + '">'
-                    + self._getPreparedTermHeader(
-                        dictName,
-                        frontBracket,
-                        backBracket,
-                        term,
-                        entry["term"],
-                        entry["altterm"],
-                        entry["pronunciation"],
-                        True,
-                    )
-                    + "</li>"
-                )
-                entryCount += 1
-            html += "</ol>"
-        return (
-            html
-            + '<br></div><div class="resizeBar" onmousedown="hresize(event)"></div></div>'
-        )
+        return cached
 
-    def _getPreparedTermHeader(
-        self,
-        dictName: str,
-        frontBracket: str,
-        backBracket: str,
-        target: str,
-        term: str,
-        altterm: str,
-        pronunciation: str,
-        sb: bool = False,
-    ) -> str:
-        altFB = frontBracket
-        altBB = backBracket
-        if pronunciation == term:
-            pronunciation = ""
-        if altterm == term:
-            altterm = ""
-        if altterm == "":
-            altFB = ""
-            altBB = ""
-        if not self._termHeaders or (
-            dictName == "Google Images" or dictName == "Forvo"
-        ):
-            if sb:
-                header = '◳f<span class="term mainword">◳t</span>◳b◳x<span class="altterm  mainword">◳a</span>◳y<span class="pronunciation">◳p</span>'
-            else:
-                header = '◳f<span class="listTerm">◳t</span>◳b◳x<span class="listAltTerm">◳a</span>◳y<span class="listPronunciation">◳p</span>'
-        else:
-            if sb:
-                header = self._termHeaders[dictName][1]
-            else:
-                header = self._termHeaders[dictName][0]
+    def _getResultJSON(self, search: _Search) -> str:
+        """Run ``search`` and serialize what ``addResultTab`` needs to show it.
 
-        # TODO: @ColinKennedy - this code is awful
-        return (
-            header.replace("◳t", self._highlightTarget(term, target))
-            .replace("◳a", self._highlightTarget(altterm, target))
-            .replace("◳p", self._highlightTarget(pronunciation, target))
-            .replace("◳f", frontBracket)
-            .replace("◳b", backBracket)
-            .replace("◳x", altFB)
-            .replace("◳y", altBB)
-        )
+        Only the text of each entry is prepared here. Its markup is cloned from the
+        templates in dictionaryInit.html. Definitions are left out, the tab requests
+        them with ``getBodies:`` when they scroll into view.
 
-    def _prepareResults(
-        self,
-        all_results: tuple[dictdb_.DictSearchResults, set[str]],
-        term: str,
-        font: str,
-    ) -> str:
+        """
+        # NOTE: Results show the duplicate header, fields and add-type settings
+        self.flushSettings()
+        selectedGroup = search["group"]
+        cleaned = self._cleanTerm(search["term"])
         frontBracket = self.config["frontBracket"]
         backBracket = self.config["backBracket"]
-        results, known_dictionaries = all_results
-
-        if results:
-            html = self._getSideBar(results, term, font, frontBracket, backBracket)
-            html += '<div class="mainDictDisplay">'
-            dictCount = 0
-            entryCount = 0
-            imgTooltip = ""
-            clipTooltip = ""
-            sendTooltip = ""
-            if self.config["tooltips"]:
-                imgTooltip = ' title="Add this definition, or any selected text and this definition\'s header to the card exporter (opens the card exporter if it is not yet opened)." '
-                clipTooltip = ' title="Copy this definition, or any selected text to the clipboard." '
-                sendTooltip = " title=\"Send this definition, or any selected text and this definition's header to the card exporter to this dictionary's target fields. It will send it to the current target window, be it an Editor window, or the Review window.\" "
-
-            if "Google Images" in known_dictionaries:
-                html += self._getGoogleDictionaryResults(
-                    term, dictCount, frontBracket, backBracket, entryCount, font
-                )
-                dictCount += 1
-                entryCount += 1
+        cached = self._getCachedResults(search, cleaned)
+        payload: _ResultPayload = {
+            "id": 0,
+            "search": search,
+            "size": len(cached.dictionaries),
+            "term": cleaned,
+            "singleTab": self._dictInt.tabB.singleTab,
+            "font": self._getFontName(selectedGroup),
+            "brackets": (frontBracket, backBracket),
+            "tooltips": self.config["tooltips"],
+            "fieldNames": [],
+            "extras": [],
+        }
 
-            if "Forvo" in known_dictionaries:
-                html += self._getForvoDictionaryResults(
-                    term, dictCount, frontBracket, backBracket, entryCount, font
-                )
-                dictCount += 1
-                entryCount += 1
-
-            for dictName, dictResults in results.items():
-                duplicateHeader = self._getDuplicateHeaderCB(dictName)
-                overwrite = self._getOverwriteChecks(dictCount, dictName)
-                select = self._getFieldChecks(dictName)
-                html += (
-                    '<div data-index="'
-                    + str(dictCount)
-                    + '" class="dictionaryTitleBlock"><div  '
-                    + font
-                    + '  class="dictionaryTitle">'
-                    + dictName.replace("_", " ")
-                    + '</div><div class="dictionarySettings">'
-                    + duplicateHeader
-                    + overwrite
-                    + select
-                    + '<div class="dictNav"><div onclick="navigateDict(event, false)" class="prevDict">▲</div><div onclick="navigateDict(event, true)" class="nextDict">▼</div></div></div></div>'
+        if not cached.stored.entries:
+            return _serializeResultPayload(payload, cached.dictionaries)
+
+        font = self._getFontFamily(selectedGroup)
+        payload["fieldNames"] = self._getFieldNames()
+        extras = payload["extras"]
+
+        # NOTE: These are rendered per tab because each one fetches its images /
+        # audio into a placeholder of its own.
+        #
+        if "Google Images" in cached.knownDictionaries:
+            extras.append(
+                self._getGoogleDictionaryResults(
+                    cleaned, len(extras), frontBracket, backBracket, len(extras), font
                 )
-                dictCount += 1
-                for idx, entry in enumerate(dictResults):
-                    html += (
-                        '<div data-index="'
-                        + str(entryCount)
-                        + '" class="termPronunciation"><span '
-                        + font
-                        + ' class="tpCont">'
-                        + self._getPreparedTermHeader(
-                            dictName,
-                            frontBracket,
-                            backBracket,
-                            term,
-                            entry["term"],
-                            entry["altterm"],
-                            entry["pronunciation"],
-                        )
-                        + ' <span class="starcount">'
-                        + entry["starCount"]
-                        + '</span></span><div class="defTools"><div onclick="ankiExport(event, \''
-                        + dictName
-                        + '\')" class="ankiExportButton"><img '
-                        + imgTooltip
-                        + ' src="icons/anki.png"></div><div onclick="clipText(event)" '
-                        + clipTooltip
-                        + ' class="clipper">✂</div><div '
-                        + sendTooltip
-                        + " onclick=\"sendToField(event, '"
-                        + dictName
-                        + '\')" class="sendToField">➠</div><div class="defNav"><div onclick="navigateDef(event, false)" class="prevDef">▲</div><div onclick="navigateDef(event, true)" class="nextDef">▼</div></div></div></div><div'
-                        + font
-                        + ' class="definitionBlock">'
-                        + self._highlightTarget(
-                            self._highlightExamples(entry["definition"]), term
-                        )
-                        + "</div>"
-                    )
-                    entryCount += 1
+            )
 
-        else:
-            html = (
-                '<style>.noresults{font-family: Arial;}.vertical-center{height: 400px; width: 60%; margin: 0 auto; display: flex; justify-content: center; align-items: center;}</style> </head> <div class="vertical-center noresults"> <div align="center"> <img src="icons/searchzero.svg" width="50px" height="40px"> <h3 align="center">No dictionary entries were found for "'
-                + term
-                + '".</h3> </div></div>'
+        if "Forvo" in cached.knownDictionaries:
+            extras.append(
+                self._getForvoDictionaryResults(
+                    cleaned, len(extras), frontBracket, backBracket, len(extras), font
+                )
             )
-        return html.replace("'", "\\'")
+
+        # NOTE: Each tab gets its own id, even for the same search, because a tab
+        # releases its results once it closes.
+        #
+        self._resultCount += 1
+        self._results[self._resultCount] = cached.stored
+
+        if len(self._results) > _MAX_STORED_RESULTS:
+            # NOTE: Tabs release their results once they close. This only drops
+            # the results of tabs that never said so.
+            #
+            del self._results[next(iter(self._results))]
+
+        payload["id"] = self._resultCount
+
+        return _serializeResultPayload(payload, cached.dictionaries)
+
+    def _loadResultBodies(self, resultId: int, start: int, end: int) -> None:
+        stored = self._results.get(resultId)
+
+        if not stored:
+            # NOTE: The tab was closed before its request arrived
+            return
+
+        response = {
+            "id": resultId,
+            "start": start,
+            "bodies": search_results.get_result_bodies(self.db, stored, start, end),
+        }
+        self.eval("loadBodies(%s);" % json.dumps(response, ensure_ascii=False))
+
+    def _getHighlighter(
+        self, target: str, selectedGroup: typer.DictionaryGroup2, deinflect: bool
+    ) -> highlighter.Highlighter:
+        """Get what highlights ``target``, and the forms it may be inflected from."""
+        targets = [target]
+
+        if deinflect:
+            langs = {dictionary["lang"] for dictionary in selectedGroup["dictionaries"]}
+
+            for lang in langs & self._conjugations.keys():
+                targets += self.db.getDeinflections(target, self._conjugations[lang])
+
+        return highlighter.Highlighter(
+            targets, self.config["highlightTarget"], self.config["highlightSentences"]
+        )
+
+    def _addResultWrappers(self, results: _StringSequence) -> _StringSequence:
+        for idx, result in enumerate(results):
+            if "dictionaryTitleBlock" not in result:
+                results[idx] = '<div class="definitionBlock">' + result + "</div>"
+        return results
+
+    def _highlightTarget(self, text: str, term: str) -> str:
+        highlight = highlighter.Highlighter([term], self.config["highlightTarget"])
+
+        return highlight.highlight(text)
 
     def _attemptFetchForvo(self, term: str, idName: str) -> str:
         forvo = forvodl.Forvo(self.config["ForvoLanguage"])
@@ -599,94 +647,137 @@ class MIDict(webview.AnkiWebView):
     def _getCleanedUrls(self, urls: typing.Iterable[str]) -> list[str]:
         return [x.replace("\\", "\\\\") for x in urls]
 
-    def _getDuplicateHeaderCB(self, dictName: str) -> str:
-        tooltip = ""
-        if self.config["tooltips"]:
-            tooltip = ' title="Enable this option if this dictionary has the target word\'s header within the definition. Enabling this will prevent the addon from exporting duplicate header."'
-        checked = " "
-        className = "checkDict" + re.sub(r"\s", "", dictName)
-        duplicates = self._dupHeaders or {}
-
-        if dictName in duplicates:
-            num = duplicates.get(dictName)
-            if num == 1:
-                checked = " checked "
-        return (
-            '<div class="dupHeadCB" data-dictname="'
-            + dictName
-            + '">Duplicate Header:<input '
-            + checked
-            + tooltip
-            + ' class="'
-            + className
-            + '" onclick="handleDupChange(this, \''
-            + className
-            + '\')" type="checkbox"></div>'
-        )
-
     def _maybeSearchTerms(self) -> None:
         for t in self._terms:
             self._dictInt.initSearch(t)
         self._terms = []
 
     def _handleDictAction(self, dAct: str) -> None:
-        if dAct.startswith("MigakuDictionaryLoaded"):
-            self._maybeSearchTerms()
-        elif dAct.startswith("forvo:"):
-            urls = json.loads(dAct[6:])
-            self._downloadForvoAudio(urls)
-        elif dAct.startswith("updateTerm:"):
-            term = dAct[11:]
-            self._dictInt.search.setText(term)
-        elif dAct.startswith("saveFS:"):
-            f1, f2 = dAct[7:].split(":")
-            self._dictInt.writeConfig("fontSizes", (int(f1), int(f2)))
-        elif dAct.startswith("setDup:"):
-            dup, name = dAct[7:].split("◳")
-            self._dictInt.db.setDupHeader(dup, name)
+        """Handle a batch of ``[name, data]`` messages, sent by ``sendMessage``."""
+        start = time.perf_counter()
+
+        try:
+            messages = json.loads(dAct)
+        except ValueError:
+            _LOGGER.warning('Skipped unknown bridge command "%s".', dAct[:100])
+
+            return
+
+        for name, data in messages:
+            handler = self._messageHandlers.get(name)
+
+            if not handler:
+                _LOGGER.warning('Skipped unknown "%s" bridge message.', name)
+
+                continue
+
+            handler(data)
+
+        _LOGGER.debug(
+            "Handled %s bridge message(s) in %.2f ms.",
+            len(messages),
+            (time.perf_counter() - start) * 1000,
+        )
+
+    def _queueSetting(
+        self, key: tuple[str, str], write: typing.Callable[[], None]
+    ) -> None:
+        """Write a setting later, replacing any pending write of the same ``key``."""
+        if key in self._pendingSettings:
+            self._coalescedSettings += 1
+
+        self._pendingSettings[key] = write
+        self._settingsTimer.start()
+
+    def _onLoaded(self, data: None) -> None:
+        self._loaded = True
+        self._maybeSearchTerms()
+
+    def _onGetBodies(self, data: dict[str, int]) -> None:
+        self._loadResultBodies(data["id"], data["start"], data["end"])
+
+    def _onReleaseResults(self, resultId: int) -> None:
+        self._results.pop(resultId, None)
+
+    def _onRestoreTab(self, data: dict[str, typing.Any]) -> None:
+        self.eval(
+            "restoreResultTab(%d, %s);"
+            % (data["token"], self._getResultJSON(data["search"]))
+        )
+
+    def _onUpdateTerm(self, term: str) -> None:
+        self._dictInt.search.setText(term)
+
+    def _onSaveFontSizes(self, sizes: list[int]) -> None:
+        entries, definitions = sizes
+        self._queueSetting(
+            ("fontSizes", ""),
+            functools.partial(
+                self._dictInt.writeConfig, "fontSizes", (entries, definitions)
+            ),
+        )
+
+    def _onSetDuplicateHeader(self, data: dict[str, typing.Any]) -> None:
+        def write() -> None:
+            self.db.setDupHeader("1" if data["enabled"] else "0", data["dictName"])
             self._dupHeaders = self.db.getDupHeaders()
-        elif dAct.startswith("fieldsSetting:"):
-            fields = json.loads(dAct[14:])
-            if fields["dictName"] == "Google Images":
-                self._dictInt.writeConfig("GoogleImageFields", fields["fields"])
-            elif fields["dictName"] == "Forvo":
-                self._dictInt.writeConfig("ForvoFields", fields["fields"])
-            else:
-                self._dictInt.updateFieldsSetting(fields["dictName"], fields["fields"])
-        elif dAct.startswith("overwriteSetting:"):
-            addType = _validate_add_type(json.loads(dAct[17:]))
-
-            if addType["name"] == "Google Images":
-                self._dictInt.writeConfig("GoogleImageAddType", addType["type"])
-            elif addType["name"] == "Forvo":
-                self._dictInt.writeConfig("ForvoAddType", addType["type"])
-            else:
-                self._dictInt.updateAddType(addType["name"], addType["type"])
-        elif dAct.startswith("clipped:"):
-            text = dAct[8:]
 
-            if clipboard := self._dictInt.mw.app.clipboard():
-                clipboard.setText(text.replace("<br>", "\n"))
-            else:
-                raise RuntimeError(f'Cannot do "{dAct}" action. No clipboard found.')
-        elif dAct.startswith("sendToField:"):
-            name, text = dAct[12:].split("◳◴")
-            self._sendToField(name, text)
-        elif dAct.startswith("sendAudioToField:"):
-            urls = dAct[17:]
-            self._sendAudioToField(urls)
-        elif dAct.startswith("sendImgToField:"):
-            urls = dAct[15:]
-            self._sendImgToField(urls)
-        elif dAct.startswith("addDef:"):
-            dictName, word, text = dAct[7:].split("◳◴")
-            self._addDefToExportWindow(dictName, word, text)
-        elif dAct.startswith("audioExport:"):
-            word, urls = dAct[12:].split("◳◴")
-            self._addAudioToExportWindow(word, urls)
-        elif dAct.startswith("imgExport:"):
-            word, urls = dAct[10:].split("◳◴")
-            self._addImgsToExportWindow(word, json.loads(urls))
+        self._queueSetting(("duplicateHeader", data["dictName"]), write)
+
+    def _onFieldsSetting(self, fields: dict[str, typing.Any]) -> None:
+        write: typing.Callable[[], None]
+
+        if fields["dictName"] == "Google Images":
+            write = functools.partial(
+                self._dictInt.writeConfig, "GoogleImageFields", fields["fields"]
+            )
+        elif fields["dictName"] == "Forvo":
+            write = functools.partial(
+                self._dictInt.writeConfig, "ForvoFields", fields["fields"]
+            )
+        else:
+            write = functools.partial(
+                self._dictInt.updateFieldsSetting, fields["dictName"], fields["fields"]
+            )
+
+        self._queueSetting(("fields", fields["dictName"]), write)
+
+    def _onAddTypeSetting(self, data: typing.Any) -> None:
+        addType = _validate_add_type(data)
+        write: typing.Callable[[], None]
+
+        if addType["name"] == "Google Images":
+            write = functools.partial(
+                self._dictInt.writeConfig, "GoogleImageAddType", addType["type"]
+            )
+        elif addType["name"] == "Forvo":
+            write = functools.partial(
+                self._dictInt.writeConfig, "ForvoAddType", addType["type"]
+            )
+        else:
+            write = functools.partial(
+                self._dictInt.updateAddType, addType["name"], addType["type"]
+            )
+
+        self._queueSetting(("addType", addType["name"]), write)
+
+    def _onClip(self, text: str) -> None:
+        if clipboard := self._dictInt.mw.app.clipboard():
+            clipboard.setText(text.replace("<br>", "\n"))
+        else:
+            raise RuntimeError("Cannot copy text. No clipboard found.")
+
+    def _onSendToField(self, data: dict[str, str]) -> None:
+        self._sendToField(data["dictName"], data["text"])
+
+    def _onAddDefinition(self, data: dict[str, str]) -> None:
+        self._addDefToExportWindow(data["dictName"], data["word"], data["text"])
+
+    def _onAudioExport(self, data: dict[str, typing.Any]) -> None:
+        self._addAudioToExportWindow(data["word"], data["urls"])
+
+    def _onImageExport(self, data: dict[str, typing.Any]) -> None:
+        self._addImgsToExportWindow(data["word"], data["urls"])
 
     def _addImgsToExportWindow(self, word: str, urls: typing.Iterable[str]) -> None:
         self._initCardExporterIfNeeded()
@@ -783,17 +874,17 @@ class MIDict(webview.AnkiWebView):
 
         return fieldText
 
-    def _addAudioToExportWindow(self, word: str, urls: str) -> None:
+    def _addAudioToExportWindow(self, word: str, urls: list[str]) -> None:
         self._initCardExporterIfNeeded()
         audioSeparator = ""
-        soundFiles = self._downloadForvoAudio(json.loads(urls))
+        soundFiles = self._downloadForvoAudio(urls)
 
         if soundFiles and self.addWindow:
             self.addWindow.addDefinition("Forvo", word, audioSeparator.join(soundFiles))
 
-    def _sendAudioToField(self, urls: str) -> None:
+    def _sendAudioToField(self, urls: list[str]) -> None:
         audioSeparator = ""
-        soundFiles = self._downloadForvoAudio(json.loads(urls))
+        soundFiles = self._downloadForvoAudio(urls)
         self._sendToField("Forvo", audioSeparator.join(soundFiles))
 
     def _downloadForvoAudio(self, urls: typing.Iterable[str]) -> list[str]:
@@ -819,13 +910,12 @@ class MIDict(webview.AnkiWebView):
 
         return tags
 
-    def _sendImgToField(self, json_urls: str) -> None:
+    def _sendImgToField(self, urls: list[str]) -> None:
         if (self.reviewer and self.reviewer.card) or (
             self.currentEditor and self.currentEditor.note
         ):
             urlsList: list[str] = []
             imgSeparator = ""
-            urls = typing.cast(list[str], json.loads(json_urls))
 
             for imgurl in urls:
                 try:
@@ -936,21 +1026,21 @@ class MIDict(webview.AnkiWebView):
                     note.fields[field_index] = new_value
             self.currentEditor.loadNote()
 
-    def _getOverwriteChecks(self, dictCount: int, dictName: str) -> str:
-        addType: typer.AddType
-
+    def _getAddType(self, dictName: str) -> typer.AddType:
         if dictName == "Google Images":
-            addType = self.config["GoogleImageAddType"]
-        elif dictName == "Forvo":
-            addType = self.config["ForvoAddType"]
-        else:
-            found = self.db.getAddType(dictName)
+            return self.config["GoogleImageAddType"]
+        if dictName == "Forvo":
+            return self.config["ForvoAddType"]
+
+        found = self.db.getAddType(dictName)
 
-            if not found:
-                raise RuntimeError(f'Dictionary "{dictName}" has no adder-type.')
+        if not found:
+            raise RuntimeError(f'Dictionary "{dictName}" has no adder-type.')
 
-            addType = found
+        return found
 
+    def _getOverwriteChecks(self, dictCount: int, dictName: str) -> str:
+        addType = self._getAddType(dictName)
         tooltip = ""
         if self.config["tooltips"]:
             tooltip = " title=\"This determines the conditions for sending a definition (or a Google Image) to a field. Overwrite the target field's content. Add to the target field's current contents. Only add definitions to the target field if it is empty.\""
@@ -1094,11 +1184,34 @@ class MIDict(webview.AnkiWebView):
         ):
             self._customFontsLoaded.append(selectedGroup["font"])
             self._injectFont(selectedGroup["font"])
-        html, cleaned, singleTab = self._getHTMLResult(term, selectedGroup)
-        self.eval(
-            "addNewTab('%s', '%s', %s);"
-            % (html.replace("\r", "<br>").replace("\n", "<br>"), cleaned, singleTab)
-        )
+        search: _Search = {
+            "term": term,
+            "group": selectedGroup,
+            "searchType": typing.cast(
+                typer.SearchTerm, _verify(self._sType).currentText()
+            ),
+            "deinflect": self.deinflect,
+        }
+        self.eval("addResultTab(%s);" % self._getResultJSON(search))
+
+    def applyConfiguration(self, config: typer.Configuration) -> None:
+        """Use ``config`` from now on, without reloading the page or its open tabs.
+
+        Open tabs keep how they were rendered. Searches after this use ``config``,
+        plus the latest dictionary headers and conjugations.
+
+        """
+        self.config = config
+        self._jSend = self.config["jReadingEdit"]
+        self._maxW = self.config["maxWidth"]
+        self._maxH = self.config["maxHeight"]
+        self._termHeaders, self._dupHeaders = self._loadHeaders()
+        self._conjugations = self._loadConjugations()
+        self._resultCache.clear()
+        self.deinflect = self.config["deinflect"]
+
+        if self._loaded:
+            self.eval("setFontSizes(%d, %d);" % tuple(self.config["fontSizes"]))
 
     def attemptAutoAdd(self, bulkExport: bool) -> None:
         if self.addWindow:
@@ -1160,9 +1273,36 @@ class MIDict(webview.AnkiWebView):
             self.addWindow.scrollArea.show()
             self.addWindow.exportWord(word)
 
+    def flushSettings(self) -> None:
+        """Write every setting that the page changed and that is still pending."""
+        self._settingsTimer.stop()
+
+        if not self._pendingSettings:
+            return
+
+        writes = list(self._pendingSettings.values())
+        self._pendingSettings.clear()
+
+        for write in writes:
+            write()
+
+        _LOGGER.debug(
+            "Wrote %s setting(s), %s more were coalesced.",
+            len(writes),
+            self._coalescedSettings,
+        )
+        self._coalescedSettings = 0
+
     def loadHTMLURL(self, html: str, url: qt.QUrl) -> None:
         _verify(self.page()).setHtml(html, url)
 
+    def searchTerms(self, terms: list[str]) -> None:
+        """Search for each of ``terms``, as soon as the page has loaded."""
+        self._terms += terms
+
+        if self._loaded:
+            self._maybeSearchTerms()
+
     def setCurrentEditor(self, editor: editor_.Editor, target: str = "") -> None:
         if editor == self.currentEditor:
             return
@@ -1512,6 +1652,7 @@ class DictInterface(qt.QWidget):
         welcome: str,
         parent: typing.Optional[qt.QWidget] = None,
         terms: typing.Optional[list[str]] = None,
+        visible: bool = True,
     ):
         super().__init__(parent)
         self.db = dictdb
@@ -1527,7 +1668,7 @@ class DictInterface(qt.QWidget):
         self.blackBase = self._getFontColor(qt.QColor(qt.Qt.GlobalColor.black))
         self.mw = mw
         self.iconpath = os.path.join(path, "icons")
-        self._startUp(terms or [])
+        self._startUp(terms or [], visible)
         self._setHotkeys()
         aqt_utils.ensureWidgetInScreenBoundaries(self)
 
@@ -1573,7 +1714,7 @@ class DictInterface(qt.QWidget):
         self.config = config
         self.dict.config = config
 
-    def _startUp(self, terms: list[str]) -> None:
+    def _startUp(self, terms: list[str], visible: bool) -> None:
         terms = self._refineToValidSearchTerms(terms)
         willSearch = False
         if terms:
@@ -1631,8 +1772,9 @@ class DictInterface(qt.QWidget):
         if self.config["tooltips"]:
             self._initTooltips()
 
-        self.show()
-        self.search.setFocus()
+        if visible:
+            self.show()
+            self.search.setFocus()
         if self.nightModeToggler.day:
             self._loadDay()
         else:
@@ -1644,10 +1786,14 @@ class DictInterface(qt.QWidget):
 
     def _maybeSetToAlwaysOnTop(self) -> None:
         if self.alwaysOnTop:
+            # NOTE: Changing the flags of a window hides it
+            visible = self.isVisible()
             self.setWindowFlags(
                 self.windowFlags() | qt.Qt.WindowType.WindowStaysOnTopHint
             )
-            self.show()
+
+            if visible:
+                self.show()
 
     def _initTooltips(self) -> None:
         self.dictGroups.setToolTip("Select the dictionary group.")
@@ -1739,31 +1885,6 @@ class DictInterface(qt.QWidget):
         self.setFocus()
         self.activateWindow()
 
-    def _resetDict(self, willSearch: bool, terms: list[str]) -> None:
-        newDict = MIDict(
-            self, self.db, self.addonPath, self.nightModeToggler.day, terms
-        )
-        newDict.setSType(self._sType)
-        html, url = self._getHTMLURL(willSearch, self.nightModeToggler.day)
-        newDict.loadHTMLURL(html, url)
-        newDict.setSType(self._sType)
-        if self.dict.addWindow and self.dict.addWindow.scrollArea.isVisible():
-            # TODO: @colin.kennedy - Do we actually need to do this?
-            self.dict.addWindow.saveSizeAndPos()
-            self.dict.addWindow.scrollArea.close()
-            self.dict.addWindow.scrollArea.deleteLater()
-        self.currentTarget.setText("")
-        self.dict.currentEditor = None
-        self.dict.reviewer = None
-        self.mainLayout.replaceWidget(self.dict, newDict)
-        self.dict.close()
-        self.dict.deleteLater()
-        self.dict = newDict
-        if self.config["deinflect"]:
-            self.dict.deinflect = True
-        else:
-            self.dict.deinflect = False
-
     def _getUserGroups(self) -> dict[str, typer.DictionaryGroup2]:
         groups = self.config["DictionaryGroups"]
         userGroups: dict[str, typer.DictionaryGroup2] = {}
@@ -2533,14 +2654,8 @@ QScrollBar:vertical {
         self.dict.addNewTab(term, selectedGroup)
         self.search.setFocus()
 
-    def resetConfiguration(self, terms: list[str]) -> None:
-        terms = self._refineToValidSearchTerms(terms)
-        willSearch = False
-
-        if terms:
-            willSearch = True
-
-        self.search.setText("")
+    def applyConfiguration(self) -> None:
+        """Reload the add-on's configuration into this window and its open tabs."""
         self.allGroups = self._getAllGroups()
         self.config = self.getConfig()
         self.defaultGroups = self.db.getDefaultGroups()
@@ -2578,7 +2693,20 @@ QScrollBar:vertical {
                 self.dictGroups.setStyleSheet(self.getMacNightComboStyle())
             else:
                 self.dictGroups.setStyleSheet(self.getComboStyle())
-        self._resetDict(willSearch, terms)
+        self.dict.applyConfiguration(self.config)
+
+    def resetConfiguration(self, terms: list[str]) -> None:
+        """Reload the configuration as the window reopens and search for ``terms``.
+
+        The page and its tabs are kept. See :meth:`MIDict.applyConfiguration`.
+
+        """
+        self.search.setText("")
+        self.applyConfiguration()
+        self.currentTarget.setText("")
+        self.dict.currentEditor = None
+        self.dict.reviewer = None
+        self.dict.searchTerms(self._refineToValidSearchTerms(terms))
 
     def saveHistory(self) -> None:
         path = os.path.join(self.mw.col.media.dir(), "_searchHistory.json")
@@ -2701,6 +2829,7 @@ QScrollBar:vertical {
 
     # TODO: @ColinKennedy - return bool?
     def hideEvent(self, event: typing.Optional[qt.QHideEvent]) -> None:
+        self.dict.flushSettings()
         self.saveSizeAndPos()
 
         if event:
@@ -2820,6 +2949,29 @@ def dictionaryInit(terms: typing.Union[list[str], str, None] = None) -> None:
         dictionary.hide()
 
 
+def prepareDictionary() -> None:
+    """Build the dictionary window and load its page, without showing it.
+
+    The first search then only has to show the window, see :func:`dictionaryInit`.
+
+    """
+    # TODO: @ColinKennedy - Remove the cyclic dependency later
+    from . import migaku_dictionary
+
+    if migaku_dictionary.get_unsafe():
+        return
+
+    migaku_dictionary.set(
+        DictInterface(
+            dictdb_.get(),
+            aqt.mw,
+            _CURRENT_DIRECTORY,
+            welcomer.welcomeScreen(),
+            visible=False,
+        )
+    )
+
+
 def showAfterGlobalSearch() -> None:
     # TODO: @ColinKennedy - Remove the cyclic dependency later
     from . import migaku_dictionary
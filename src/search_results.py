@@ -0,0 +1,92 @@
+"""Render the entries of a dictionary search into what the result tabs show.
+
+Nothing here needs Anki, so ``dictionary_cli.py benchmark`` can time it on its own.
+
+"""
+
+from __future__ import annotations
+
+import base64
+import html
+import mimetypes
+import re
+import typing
+
+from . import dictdb, highlighter, typer
+
+_MEDIA_PLACEHOLDER = re.compile(r'data-media="([^"]*)"')
+
+
+class StoredResults(typing.NamedTuple):
+    """The found entries of a search, kept until its tab requests their definitions."""
+
+    highlighter: highlighter.Highlighter
+    entries: list[tuple[str, typer.DictionarySearchHeader]]
+
+
+def get_result_entry(
+    highlight: highlighter.Highlighter, entry: typer.DictionarySearchHeader
+) -> list[str]:
+    """Get the highlighted term, alternative term and pronunciation of ``entry``."""
+    term = entry["term"]
+    altterm = entry["altterm"]
+    pronunciation = entry["pronunciation"]
+
+    return [
+        highlight.highlight(term),
+        "" if altterm == term else highlight.highlight(altterm),
+        "" if pronunciation == term else highlight.highlight(pronunciation),
+        entry["starCount"],
+    ]
+
+
+def get_result_bodies(
+    db: dictdb.DictDB, stored: StoredResults, start: int, end: int
+) -> list[str]:
+    """Get the highlighted definitions of the ``start:end`` entries of ``stored``."""
+    entries = stored.entries[start:end]
+    definitions: dict[str, dict[int, typer.DictionaryDefinition]] = {}
+
+    for dictName, entry in entries:
+        definitions.setdefault(dictName, {})[entry["rowid"]] = {
+            "definition": "",
+            "exampleSpans": [],
+        }
+
+    for dictName, rows in definitions.items():
+        rows.update(db.getDefinitions(dictName, list(rows)))
+
+    bodies: list[str] = []
+
+    for dictName, entry in entries:
+        found = definitions[dictName][entry["rowid"]]
+        definition = inline_media(
+            db,
+            dictName,
+            stored.highlighter.highlight(found["definition"], found["exampleSpans"]),
+        )
+        bodies.append(definition.replace("\n", "").replace("\r", "<br>"))
+
+    return bodies
+
+
+def inline_media(db: dictdb.DictDB, dictName: str, text: str) -> str:
+    """Load the dictionary media that ``text`` points to into ``<img>`` tags."""
+    if "data-media=" not in text:
+        return text
+
+    def _replace(match: re.Match[str]) -> str:
+        path = html.unescape(match.group(1))
+        media = db.getMedia(dictName, path)
+
+        if media is None:
+            return match.group(0)
+
+        with media:
+            data = base64.b64encode(media).decode("ascii")
+
+        mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+        return 'src="data:%s;base64,%s"' % (mime, data)
+
+    return _MEDIA_PLACEHOLDER.sub(_replace, text)
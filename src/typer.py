@@ -29,6 +29,7 @@ SearchTerm = typing.Union[
     typing.Literal["Anywhere"],
     typing.Literal["Exact"],
     typing.Literal["Definition"],
+    typing.Literal["Example"],
 ]
 
 
@@ -68,6 +69,7 @@ class Configuration(typing.TypedDict):
     dictAlwaysOnTop: bool
     dictOnStart: bool
     dictSearch: int
+    dictWarmStart: bool
     dictSizePos: typing.Union[tuple[int, int, int, int], typing.Literal[False]]
     disableCondensed: bool
     displayAgain: bool
@@ -157,6 +159,25 @@ class DictionaryResult(typing.TypedDict):
     examples: str
     audio: str
     starCount: str
+    # NOTE: The ``(start, end)`` of each 「example sentence」 within ``definition``
+    exampleSpans: list[tuple[int, int]]
+
+
+class DictionarySearchHeader(typing.TypedDict):
+    """The part of a search result that is shown before its definition is loaded."""
+
+    term: str
+    altterm: str
+    pronunciation: str
+    pos: int
+    starCount: str
+    rowid: int
+
+
+class DictionaryDefinition(typing.TypedDict):
+    definition: str
+    # NOTE: The ``(start, end)`` of each 「example sentence」 within ``definition``
+    exampleSpans: list[tuple[int, int]]
 
 
 # TODO: @ColinKennedy - Rename this classes later
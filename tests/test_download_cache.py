@@ -0,0 +1,101 @@
+"""Make sure that :mod:`download_cache` recovers from a bad partial download."""
+
+from __future__ import annotations
+
+import http.server
+import os
+import shutil
+import tempfile
+import threading
+import typing
+import unittest
+from unittest import mock
+
+import download_cache
+
+_BODY = b"the complete file"
+_ETAG = '"current"'
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Serve ``_BODY``, but refuse every ranged request like a changed resource."""
+
+    requests: list[typing.Optional[str]] = []
+
+    def do_GET(self) -> None:
+        self.requests.append(self.headers.get("Range"))
+
+        if self.headers.get("Range"):
+            self.send_response(416)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(_BODY)))
+        self.send_header("ETag", _ETAG)
+        self.end_headers()
+        self.wfile.write(_BODY)
+
+    def log_message(self, *_: typing.Any) -> None:
+        pass
+
+
+class StalePart(unittest.TestCase):
+    """Download a file whose ``.part`` can no longer be resumed."""
+
+    def setUp(self) -> None:
+        self._directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._directory)
+
+        patcher = mock.patch.object(
+            download_cache, "_CACHE_DIRECTORY", self._directory
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self._server = http.server.HTTPServer(("127.0.0.1", 0), _Handler)
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self._server.server_close)
+        self.addCleanup(self._server.shutdown)
+
+        _Handler.requests = []
+        self._url = "http://127.0.0.1:%d/file.zip" % self._server.server_port
+
+    def _add_stale_part(self) -> str:
+        path = os.path.join(self._directory, download_cache._get_key(self._url))
+
+        with open(path + ".part", "wb") as handler:
+            handler.write(b"an older, finished file")
+
+        download_cache._write_metadata(
+            path + ".part.json", {"url": self._url, "etag": '"older"'}
+        )
+
+        return path
+
+    def test_416(self) -> None:
+        """Delete the part and download the whole file once the server sends 416."""
+        path = self._add_stale_part()
+
+        self.assertEqual(path, download_cache.fetch(self._url))
+
+        with open(path, "rb") as handler:
+            self.assertEqual(_BODY, handler.read())
+
+        self.assertEqual(["bytes=23-", None], _Handler.requests)
+        self.assertFalse(os.path.exists(path + ".part"))
+        self.assertFalse(os.path.exists(path + ".part.json"))
+
+    def test_416_again(self) -> None:
+        """Don't send the stale range again on the next download."""
+        path = self._add_stale_part()
+        download_cache.fetch(self._url)
+        os.remove(path)
+        _Handler.requests = []
+
+        download_cache.fetch(self._url)
+
+        self.assertEqual([None], _Handler.requests)